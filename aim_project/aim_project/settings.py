@@ -84,6 +84,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# home.services caches each user's latest JD/resume and upcoming interviews, and
+# views act on that entry, so every process must see the same cache. Set
+# REDIS_URL (e.g. redis://127.0.0.1:6379/1) whenever more than one process
+# serves requests; the local-memory fallback is only correct for a single
+# process such as runserver.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -102,6 +125,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ProfileModelBackend is ModelBackend plus select_related('profile'). It is the
+# only backend: a second ModelBackend would re-run the password hash on every
+# failed login. Sessions created under the stock backend have to log in again.
+AUTHENTICATION_BACKENDS = [
+    'home.backends.ProfileModelBackend',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -1,36 +1,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from .models import Interview, InterviewQuestion, InterviewResult
-from .ai_interviewer import AIInterviewer
-from .interview_monitor import InterviewMonitor
+from .services import invalidate_user_interview_context, recent_day_labels
+from .tasks import mark_interview_completed, parse_report_scores
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import json
-import random
+import re
 import threading
 import tempfile
 import os
 import logging
 import base64
+from collections import Counter
+from datetime import datetime
 from io import BytesIO
-from PIL import Image
-import numpy as np
-import cv2
-from .emotion_detector import EfficientEmotionDetector
-from .posture_analyzer import MediaPipePostureAnalyzer
 
 # Configure logging
 logger = logging.getLogger('ai_interview_views')
 
+# The interviewer (LLM, speech), OpenCV/MediaPipe and NumPy stacks are imported
+# inside the views that use them, since home.urls loads this module in every worker
+
 # Global dictionary to store AI interviewer instances for each interview
 ai_interviewers = {}
 
 # Global dictionary to store behavioral analysis data during interviews
 interview_behavioral_data = {}
 
+# Per-question "Question: ... Answer: ... Score: n/10" blocks in the AI report
+_QUESTION_SCORE_RE = re.compile(r'Question:\s*(.*?)\nAnswer:.*?Score:\s*(\d+(\.\d+)?)/10', re.DOTALL)
+
 def generate_behavioral_analysis_summary(interview_id):
     """
     Generate a comprehensive behavioral analysis summary based on collected emotional and postural data.
@@ -98,8 +102,6 @@ def analyze_emotion_patterns(emotion_data):
     if not emotion_data:
         return "No emotion data available."
     
-    from collections import Counter
-    
     # Count emotions
     emotion_counts = Counter(emotion_data)
     total_detections = len(emotion_data)
@@ -139,8 +141,6 @@ def analyze_posture_patterns(posture_data):
     if not posture_data:
         return "No posture data available."
     
-    from collections import Counter
-    
     # Count postures
     posture_counts = Counter(posture_data)
     total_detections = len(posture_data)
@@ -373,6 +373,8 @@ def ai_interview_start(request, interview_id):
     """Initialize the AI interview and generate questions."""
     interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     
+    from .ai_interviewer import AIInterviewer
+
     try:
         # Create a new AI interviewer instance for this interview
         ai_interviewer = AIInterviewer()
@@ -443,6 +445,7 @@ def ai_interview_start(request, interview_id):
         # Update interview status
         interview.status = 'in_progress'
         interview.save()
+        invalidate_user_interview_context(request.user.id)
         
         return JsonResponse({
             'success': True,
@@ -519,8 +522,9 @@ def ai_interview_complete(request, interview_id):
     """Complete the AI interview and generate a report."""
     interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     
-    # Check if all questions have been answered
-    questions = interview.questions.all()
+    # Check if all questions have been answered. The report thread reads
+    # these columns and writes back only score
+    questions = interview.questions.only('id', 'interview_id', 'question_text', 'answer_text', 'is_technical')
     unanswered_questions = questions.filter(answer_text='')
     
     if unanswered_questions.exists():
@@ -533,6 +537,8 @@ def ai_interview_complete(request, interview_id):
     ai_interviewer = ai_interviewers.get(interview_id)
     
     if not ai_interviewer:
+        from .ai_interviewer import AIInterviewer
+
         # Create a new instance if not found
         ai_interviewer = AIInterviewer()
         
@@ -578,42 +584,22 @@ def ai_interview_complete(request, interview_id):
                 os.unlink(cv_temp.name)
             raise e
     
-    # Prepare interview data for report generation
-    interview_data = []
-    for q in questions:
-        interview_data.append({
-            'question_number': q.id,
-            'question_data': {
-                'id': q.id,
-                'type': 'technical' if q.is_technical else 'non-technical',
-                'question': q.question_text
-            },
-            'answer': q.answer_text
-        })
-    
     # Generate report in a background thread
     def generate_report_thread():
         try:
-            # Prepare interview data with more context
-            enhanced_interview_data = []
-            
-            # Get all questions with their answers
-            for q in questions:
-                # Determine if the question is technical
-                is_technical = q.is_technical
-                
-                # Create enhanced question data with more context
-                enhanced_interview_data.append({
-                    'question_number': q.id,
-                    'question_data': {
-                        'id': q.id,
-                        'type': 'technical' if is_technical else 'non-technical',
-                        'question': q.question_text,
-                        # Add additional context if available
-                        'context': f"This question assesses the candidate's knowledge of {'technical skills' if is_technical else 'soft skills'}"
-                    },
-                    'answer': q.answer_text or "No answer provided."
-                })
+            # Prepare interview data with more context, built as generate_report
+            # walks the questions rather than in a list of its own
+            enhanced_interview_data = ({
+                'question_number': q.id,
+                'question_data': {
+                    'id': q.id,
+                    'type': 'technical' if q.is_technical else 'non-technical',
+                    'question': q.question_text,
+                    # Add additional context if available
+                    'context': f"This question assesses the candidate's knowledge of {'technical skills' if q.is_technical else 'soft skills'}"
+                },
+                'answer': q.answer_text or "No answer provided."
+            } for q in questions)
             
             # Create a comprehensive behavioral analysis summary
             behavioral_summary = generate_behavioral_analysis_summary(interview_id)
@@ -629,11 +615,6 @@ def ai_interview_complete(request, interview_id):
                 clean_report = "Report generation encountered encoding issues. Please try again."
                 report = clean_report
             
-            # Extract scores from the report using enhanced analysis
-            technical_score = 0
-            non_technical_score = 0
-            overall_score = 0
-            
             # Get behavioral analysis data
             behavioral_data = interview_behavioral_data.get(interview_id, {})
             emotion_data = behavioral_data.get('emotions', [])
@@ -647,21 +628,8 @@ def ai_interview_complete(request, interview_id):
             eye_contact_score = calculate_eye_contact_score(emotion_data, posture_data)
             speaking_pace_score = 75  # Default score, can be enhanced with actual speech analysis
             
-            # Try to extract scores using regex
-            import re
-            tech_match = re.search(r'Technical Average[^\d]*(\d+(\.\d+)?)', report)
-            if tech_match:
-                technical_score = float(tech_match.group(1)) * 10  # Convert from 0-10 to 0-100
-            
-            # Look for non-technical score
-            non_tech_match = re.search(r'Non-Technical Average[^\d]*(\d+(\.\d+)?)', report)
-            if non_tech_match:
-                non_technical_score = float(non_tech_match.group(1)) * 10  # Convert from 0-10 to 0-100
-            
-            # Look for final score
-            final_match = re.search(r'Final Score:?\s*(\d+(\.\d+)?)', report)
-            if final_match:
-                overall_score = float(final_match.group(1))
+            # Extract scores from the report with the parser score_interview uses
+            technical_score, non_technical_score, overall_score = parse_report_scores(report)
             
             # Calculate scores based on actual LLM analysis only
             if technical_score == 0 and non_technical_score == 0 and overall_score == 0:
@@ -674,8 +642,7 @@ def ai_interview_complete(request, interview_id):
             # Update individual question scores based on the report
             try:
                 # Extract individual scores from the report
-                score_pattern = r'Question:\s*(.*?)\nAnswer:.*?Score:\s*(\d+(\.\d+)?)/10'
-                question_scores = re.findall(score_pattern, report, re.DOTALL)
+                question_scores = _QUESTION_SCORE_RE.findall(report)
                 
                 if question_scores:
                     for q_text, score_str, _ in question_scores:
@@ -685,70 +652,64 @@ def ai_interview_complete(request, interview_id):
                         
                         if matching_questions:
                             q = matching_questions[0]
-                            # Convert score from 0-10 to 0-100
-                            q.score = float(score_str) * 10
-                            q.save()
+                            # Convert score from 0-10 to 0-100, capped for an out-of-range "12/10"
+                            q.score = min(float(score_str) * 10, 100)
+                            q.save(update_fields=['score'])
                             logger.info(f"Updated score for question {q.id}: {q.score}")
             except Exception as e:
                 logger.error(f"Error updating individual question scores: {e}")
             
-            # Create or update the interview result with enhanced data
-            result, created = InterviewResult.objects.update_or_create(
-                interview=interview,
-                defaults={
-                    'technical_score': int(technical_score),
-                    'non_technical_score': int(non_technical_score),
-                    'overall_score': int(overall_score),
-                    'feedback': report,
-                    'confidence_score': confidence_score,
-                    'communication_score': communication_score,
-                    'body_language_score': body_language_score,
-                    'eye_contact_score': eye_contact_score,
-                    'speaking_pace_score': speaking_pace_score
-                }
-            )
+            # Generate daily progress data for visualization, a progression that
+            # starts low and ends at the overall score
+            import numpy as np
+            base_scores = 30 + (overall_score - 30) * np.linspace(0, 1, 7)
+            variation = np.random.default_rng().integers(-5, 5, size=7, endpoint=True)
+            scores = np.clip(base_scores + variation, 0, 100)
+            dates = recent_day_labels(7)
+            
+            defaults = {
+                'technical_score': int(technical_score),
+                'non_technical_score': int(non_technical_score),
+                'overall_score': int(overall_score),
+                'feedback': report,
+                'confidence_score': confidence_score,
+                'communication_score': communication_score,
+                'body_language_score': body_language_score,
+                'eye_contact_score': eye_contact_score,
+                'speaking_pace_score': speaking_pace_score,
+                'daily_progress_data': dict(zip(dates, scores.tolist())),
+            }
             
             # Store behavioral analysis data in the result
             if emotion_data or posture_data:
-                from collections import Counter
-                result.set_emotion_analysis({
+                defaults['emotion_analysis_data'] = {
                     'emotions': emotion_data,
                     'emotion_distribution': dict(Counter(emotion_data)) if emotion_data else {},
                     'dominant_emotion': max(set(emotion_data), key=emotion_data.count) if emotion_data else 'Unknown'
-                })
-                
-                result.set_posture_analysis({
+                }
+                defaults['posture_analysis_data'] = {
                     'postures': posture_data,
                     'posture_distribution': dict(Counter(posture_data)) if posture_data else {},
                     'dominant_posture': max(set(posture_data), key=posture_data.count) if posture_data else 'Unknown'
-                })
-                
-                result.save()
-            
-            # Generate daily progress data for visualization
-            daily_data = {}
-            start_date = timezone.now().date() - timezone.timedelta(days=6)
-            
-            # Create a progression that ends at the overall score
-            for i in range(7):
-                current_date = start_date + timezone.timedelta(days=i)
-                date_str = current_date.strftime('%d-%b-%y')
-                
-                # Start low and progress toward the final score
-                progress_factor = i / 6.0  # 0 to 1
-                base_score = 30 + (overall_score - 30) * progress_factor
-                variation = random.randint(-5, 5)
-                score = max(0, min(100, base_score + variation))
-                
-                daily_data[date_str] = score
+                }
             
-            # Save daily progress data
-            result.set_daily_progress(daily_data)
-            result.save()
+            # Regenerating a report overwrites the existing result with a bare
+            # UPDATE (which skips auto_now, hence updated_at); only a first
+            # report pays for a transaction, to survive a concurrent create
+            existing = InterviewResult.objects.filter(interview=interview)
+            if not existing.update(updated_at=timezone.now(), **defaults):
+                try:
+                    with transaction.atomic():
+                        InterviewResult.objects.create(interview=interview, **defaults)
+                except IntegrityError:
+                    existing.update(updated_at=timezone.now(), **defaults)
             
-            # Update interview status
-            interview.status = 'completed'
-            interview.save()
+            # Update interview status along with its denormalized scores; the
+            # UPDATE branches above send no post_save, so sync_interview_scores
+            # doesn't copy them
+            mark_interview_completed(
+                interview, defaults['technical_score'], defaults['non_technical_score'], defaults['overall_score']
+            )
             
             logger.info(f"Report generated for interview {interview_id} with scores: Tech={technical_score}, Non-Tech={non_technical_score}, Overall={overall_score}")
         except Exception as e:
@@ -770,7 +731,7 @@ def ai_interview_complete(request, interview_id):
 @login_required
 def ai_interview_status(request, interview_id):
     """Get the status of an AI interview."""
-    interview = get_object_or_404(Interview, id=interview_id, user=request.user)
+    interview = get_object_or_404(Interview.objects.select_related('result'), id=interview_id, user=request.user)
     
     # Get questions and count answered ones
     questions = interview.questions.all()
@@ -778,7 +739,7 @@ def ai_interview_status(request, interview_id):
     answered_questions = questions.exclude(answer_text='').count()
     
     # Check if report is available
-    report_available = hasattr(interview, 'result')
+    report_available = getattr(interview, 'result', None) is not None
     
     return JsonResponse({
         'success': True,
@@ -788,6 +749,21 @@ def ai_interview_status(request, interview_id):
         'report_available': report_available
     })
 
+# Single-id AI interview endpoints, routed through ai_interview_dispatch
+AI_INTERVIEW_ACTIONS = {
+    'start': ai_interview_start,
+    'questions': ai_interview_questions,
+    'complete': ai_interview_complete,
+    'status': ai_interview_status,
+}
+
+def ai_interview_dispatch(request, action, interview_id):
+    """Route api/ai-interview/<action>/<interview_id>/ to the matching view."""
+    view = AI_INTERVIEW_ACTIONS.get(action)
+    if view is None:
+        raise Http404("Unknown AI interview action")
+    return view(request, interview_id)
+
 @login_required
 def start_voice_interview(request, interview_id):
     """Start a voice-based AI interview."""
@@ -797,6 +773,8 @@ def start_voice_interview(request, interview_id):
         # Get or create AI interviewer instance
         ai_interviewer = ai_interviewers.get(interview_id)
         if not ai_interviewer:
+            from .ai_interviewer import AIInterviewer
+
             ai_interviewer = AIInterviewer()
             ai_interviewers[interview_id] = ai_interviewer
             
@@ -813,6 +791,7 @@ def start_voice_interview(request, interview_id):
         # Update interview status
         interview.status = 'in_progress'
         interview.save()
+        invalidate_user_interview_context(request.user.id)
         
         # Start the interview in a background thread
         def interview_thread():
@@ -878,19 +857,18 @@ def start_voice_interview(request, interview_id):
                 # Interview complete
                 interview.status = 'completed'
                 interview.save()
+                invalidate_user_interview_context(interview.user_id)
                 
                 # Generate and save report
-                interview_data = []
-                for q in interview.questions.all():
-                    interview_data.append({
-                        'question_number': q.id,
-                        'question_data': {
-                            'id': q.id,
-                            'type': 'technical' if q.is_technical else 'non-technical',
-                            'question': q.question_text
-                        },
-                        'answer': q.answer_text
-                    })
+                interview_data = ({
+                    'question_number': q['id'],
+                    'question_data': {
+                        'id': q['id'],
+                        'type': 'technical' if q['is_technical'] else 'non-technical',
+                        'question': q['question_text']
+                    },
+                    'answer': q['answer_text']
+                } for q in interview.questions.values('id', 'is_technical', 'question_text', 'answer_text'))
                 
                 report = ai_interviewer.generate_report(interview_data)
                 InterviewResult.objects.create(
@@ -1000,6 +978,12 @@ def analyze_snapshot(request):
     """
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'POST required'})
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from .emotion_detector import EfficientEmotionDetector
+    from .posture_analyzer import borrow_analyzer
+
     try:
         data = json.loads(request.body)
         image_b64 = data.get('image')
@@ -1013,8 +997,9 @@ def analyze_snapshot(request):
         # Decode base64 image
         image_data = base64.b64decode(image_b64.split(',')[-1])
         image = Image.open(BytesIO(image_data)).convert('RGB')
-        frame = np.array(image)
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        # PIL decodes to RGB, which MediaPipe takes directly; only derive the
+        # other buffers the selected analyses need
+        rgb = np.array(image)
         
         # Run analysis
         result = {}
@@ -1023,12 +1008,13 @@ def analyze_snapshot(request):
         
         if enable_emotion:
             detector = EfficientEmotionDetector()
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            face_box = detector.detect_face(gray)
-            if face_box is not None:
-                eyes = detector.detect_eyes(gray, face_box)
-                mouth = detector.detect_mouth(gray, face_box)
-                features = detector.calculate_simple_features(gray, face_box, eyes, mouth)
+            if detector.face_net is not None:
+                located = detector.detect_face_features(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+            else:
+                located = detector.detect_face_features(None, gray=cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY))
+            if located is not None:
+                face_box, eyes, mouth = located
+                features = detector.calculate_simple_features(None, face_box, eyes, mouth)
                 emotion, _ = detector.classify_emotion_simple(features)
                 result['emotion'] = emotion
             else:
@@ -1036,12 +1022,11 @@ def analyze_snapshot(request):
                 emotion = 'No Face'
         
         if enable_posture:
-            analyzer = MediaPipePostureAnalyzer()
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = analyzer.pose.process(rgb)
             posture = 'No Person'
-            if results.pose_landmarks:
-                posture, _ = analyzer.analyze(results.pose_landmarks.landmark)
+            with borrow_analyzer() as analyzer:
+                results = analyzer.pose.process(rgb)
+                if results.pose_landmarks:
+                    posture, _ = analyzer.analyze(results.pose_landmarks.landmark)
             result['posture'] = posture
         
         # Store behavioral data for the interview if interview_id is provided
@@ -1062,7 +1047,6 @@ def analyze_snapshot(request):
                     interview_behavioral_data[interview_id]['postures'].append(posture)
                 
                 # Add timestamp
-                from datetime import datetime
                 interview_behavioral_data[interview_id]['timestamps'].append(datetime.now().isoformat())
                 
                 # Limit the data to last 1000 entries to prevent memory issues
@@ -1082,7 +1066,9 @@ def run_interview_monitor_and_get_summary():
     """
     Launches the OpenCV-based interview monitor, returns the session summary for report integration.
     """
-    monitor = InterviewMonitor()
+    from .interview_monitor import InterviewMonitor
+
+    monitor = InterviewMonitor(show_ui=True)
     summary = monitor.run()  # This will block until the user quits the window
     return summary
 
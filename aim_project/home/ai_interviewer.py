@@ -2,9 +2,12 @@ import os
 import time
 import json
 import re
+import string
+import hashlib
 import tempfile
 import threading
 import logging
+import operator
 import queue
 from typing import List, Dict, Tuple, Optional, Any
 import numpy as np
@@ -33,6 +36,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ai_interviewer')
 
+# Per-answer character budget for the report prompt. Longer answers (verbose
+# STT transcripts) keep their head and tail so prompt size stays bounded.
+_MAX_ANSWER_CHARS = 1200
+_TRUNCATION_MARKER = "…[TRUNCATED]…"
+
+# Full-fidelity report mode evaluates this many Q&A pairs per LLM call
+_REPORT_CHUNK_SIZE = 8
+
+# Per-chunk evaluations keyed by a content hash so repeated report runs
+# over the same answers reuse them instead of calling the LLM again
+_chunk_evaluation_cache = {}
+_CHUNK_CACHE_MAX_ENTRIES = 256
+
+
+# Scoring patterns used by AIInterviewer._validate_and_fix_scoring. The
+# lookbehind keeps "Technical Average" from matching inside "Non-Technical Average".
+_ITEM_SCORE_RE = re.compile(r'Score:\s*(\d+(\.\d+)?)/10')
+_NON_TECH_AVG_RE = re.compile(r'Non-Technical Average[^\d]*(\d+(\.\d+)?)')
+_TECH_AVG_RE = re.compile(r'(?<!Non-)Technical Average[^\d]*(\d+(\.\d+)?)')
+_FINAL_SCORE_RE = re.compile(r'Final Score:?\s*(\d+(\.\d+)?)')
+_SCORING_SECTION_RE = re.compile(r'## Detailed Scoring.*?Final Score:.*?%', re.DOTALL)
+# All three summary figures in one pass, dispatched on the matching group name
+_SCORE_FIELDS_RE = re.compile(
+    r'(?P<non_tech>Non-Technical Average[^\d]*\d+(?:\.\d+)?)'
+    r'|(?P<tech>(?<!Non-)Technical Average[^\d]*\d+(?:\.\d+)?)'
+    r'|(?P<final>Final Score:?\s*\d+(?:\.\d+)?)'
+)
+
+
+def _truncate_answer(answer):
+    """Trim an answer to the prompt budget, keeping its beginning and end."""
+    if answer and len(answer) > _MAX_ANSWER_CHARS:
+        half = _MAX_ANSWER_CHARS // 2
+        return answer[:half] + _TRUNCATION_MARKER + answer[-half:]
+    return answer
+
 # Check if Together AI is available, otherwise use a mock
 try:
     from together import Together
@@ -396,6 +435,120 @@ class VoiceInteractionManager:
             while self.is_listening:
                 time.sleep(0.1)
 
+# Report prompt. The rubric text never changes, so it is parsed once as a
+# string.Template and only the interview-specific fields are substituted.
+_REPORT_TEMPLATE_STR = """
+        You are an expert technical interviewer analyzing a completed interview. Provide a completely honest, evidence-based assessment.
+        
+        # Job Description:
+        $job_description
+        
+        # Candidate's CV:
+        $cv
+        
+        # Interview Data:
+        Total Questions: $total
+        Technical Questions: $n_tech
+        Non-Technical Questions: $n_nontech
+        
+        # Detailed Q&A Analysis:
+        $interview_json
+        $behavioral_section
+        
+        ## EVALUATION TASK
+        Create a thorough, detailed, and critical feedback report for the candidate. Your evaluation must be rigorous, specific, and evidence-based.
+        
+        ## EVALUATION CRITERIA
+        For EACH answer, you must:
+        1. Assess factual correctness (Are there any errors or misconceptions?)
+        2. Evaluate completeness (Did they cover all important aspects?)
+        3. Check for depth of understanding (Do they show deep knowledge or just surface-level familiarity?)
+        4. Analyze communication clarity (Was the answer well-structured and clearly articulated?)
+        5. Identify specific strengths and weaknesses
+        
+        ## SCORING RUBRIC
+        For each question, assign a score from 0-10 based on these criteria:
+        - 0-2: Completely incorrect or irrelevant answer
+        - 3-4: Major gaps or errors, minimal understanding
+        - 5-6: Basic understanding with some errors or omissions
+        - 7-8: Good understanding with minor gaps or imprecisions
+        - 9-10: Excellent, comprehensive, and accurate answer
+        
+        ## REPORT STRUCTURE
+        Your report must include these sections:
+        
+        1. Overall Assessment: An objective summary of the candidate's performance
+        
+        2. Technical Skills Analysis:
+           - Evaluate EACH technical answer individually with specific feedback
+           - Identify patterns across technical answers
+           - Highlight factual errors, misconceptions, and knowledge gaps
+           - Be brutally honest in pointing out major flaws
+           - Use exact quotes from responses to highlight issues
+        
+        3. Non-Technical Skills Analysis:
+           - Evaluate EACH non-technical answer individually
+           - Assess communication skills, problem-solving approach, and self-awareness
+           - Directly reference parts of the answer to justify scores
+           - Be critical yet fair, highlighting specific language used
+        
+        4. Specific Improvement Areas:
+           - List 3-5 concrete areas where improvement is most needed
+           - For each area, provide specific examples from their answers
+           - Avoid generalities; focus on exact issues in understanding
+        
+        5. Actionable Development Plan:
+           - Recommend specific resources, courses, or activities
+           - Prioritize recommendations based on critical needs
+           - Suggest practical steps based on answer analysis
+        
+        6. Final Evaluation:
+           - Provide a clear hiring recommendation (Strongly Recommend, Recommend, Recommend with Reservations, Do Not Recommend)
+           - Justify your recommendation with specific evidence
+           - Make sure recommendations align with the overall analysis
+        
+        7. Detailed Scoring:
+           - Score each non-technical question (0-10)
+           - Score each technical question (0-10)
+           - Calculate averages for each category
+           - Calculate final score: (Non-Technical Average × 0.3) + (Technical Average × 0.7)
+           - Convert to percentage (0-100%)
+        
+        ## IMPORTANT REQUIREMENTS
+        - Be specific and reference actual answers in your feedback
+        - Do not be vague or generic - cite exact statements or omissions
+        - Be honest and critical - do not inflate scores or soften criticism
+        - Ensure mathematical accuracy in all score calculations
+        - Double-check that your evaluation is consistent with the scoring
+        
+        ## EXAMPLE EVALUATION FORMAT
+        For each answer evaluation, use this format:
+        
+        Question: [Question text]
+        Answer: [Answer text]
+        Evaluation:
+        - Factual Accuracy: [Assessment with specific examples from the answer]
+        - Completeness: [Assessment noting missing elements]
+        - Depth of Understanding: [Assessment of conceptual grasp]
+        - Communication: [Assessment of clarity and structure]
+        - Critical Issues: [Highlight major problems, misconceptions, or errors]
+        - Answer Quality: [Overall quality assessment with brutal honesty]
+        Score: [0-10]/10
+        Specific Feedback: [Concrete, harsh but fair criticism and improvement advice]
+        
+        ## EVALUATION APPROACH - PURELY DYNAMIC ANALYSIS
+        - Base your evaluation ONLY on the actual answers provided in the interview data above
+        - Quote exact phrases from the candidate's actual responses
+        - If behavioral analysis data is provided, incorporate those specific observations
+        - Do NOT use any pre-written or template responses
+        - Identify specific technical errors from the actual answers given
+        - Assess the actual communication style demonstrated in their responses
+        - Reference specific behavioral patterns observed during the video analysis
+        - Calculate scores based solely on the quality of actual responses provided
+        - If no meaningful answers were provided, state this explicitly
+        - Be completely honest about the actual performance demonstrated
+        """
+
 class AIInterviewer:
     def __init__(self):
         """Initialize the AI Interviewer with enhanced voice capabilities and API integration."""
@@ -411,6 +564,7 @@ class AIInterviewer:
             self.client = MockTogetherClient()
             
         self.model = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+        self._report_template = string.Template(_REPORT_TEMPLATE_STR)
         self.job_description = ""
         self.cv = ""
         self.interview_history = []
@@ -1107,153 +1261,64 @@ class AIInterviewer:
         
         return True
     
-    def generate_report(self, interview_data, behavioral_summary=None) -> str:
-        """Generate a detailed feedback report based on the interview with enhanced evaluation criteria, including behavioral analysis."""
-        if not interview_data:
-            logger.warning("No interview data to generate report from")
-            return ""
-        
-        # Organize questions and answers by type for better analysis
-        technical_qa_pairs = []
-        non_technical_qa_pairs = []
-        
+    def generate_report(self, interview_data, behavioral_summary=None, full_fidelity=None) -> str:
+        """Generate a detailed feedback report based on the interview with enhanced evaluation criteria, including behavioral analysis.
+
+        Args:
+            interview_data: Iterable of question/answer items; a generator is
+                consumed once, so callers need not build a list
+            behavioral_summary: Optional posture and sentiment analysis text
+            full_fidelity: Evaluate full-length answers in chunks (one LLM call
+                per chunk plus an aggregation call) instead of sending truncated
+                answers in a single prompt. Defaults to settings.REPORT_FULL_FIDELITY.
+        """
+        if full_fidelity is None:
+            full_fidelity = getattr(settings, "REPORT_FULL_FIDELITY", False)
+
+        # Count questions by type and truncate long answers in a single pass.
+        # The full answers are only held on to when they will be chunked.
+        num_technical = 0
+        num_non_technical = 0
+        compact_data = []
+        full_data = [] if full_fidelity else None
+        get_question_data = operator.itemgetter("question_data")
+
         for item in interview_data:
-            q_type = item["question_data"]["type"]
-            question = item["question_data"]["question"]
-            answer = item["answer"]
-            
-            qa_pair = {
-                "id": item["question_data"]["id"],
-                "question": question,
-                "answer": answer
-            }
-            
+            q_type = get_question_data(item)["type"]
             if q_type == "technical":
-                technical_qa_pairs.append(qa_pair)
-            else:
-                non_technical_qa_pairs.append(qa_pair)
-        
-        interview_json = json.dumps(interview_data)
-        
+                num_technical += 1
+            elif q_type == "non-technical":
+                num_non_technical += 1
+
+            compact_data.append({**item, "answer": _truncate_answer(item["answer"])})
+            if full_data is not None:
+                full_data.append(item)
+
+        # Checked after the loop because interview_data may be a generator
+        if not compact_data:
+            logger.warning("No interview data to generate report from")
+            return ""
+        total_questions = len(compact_data)
+
+        if full_fidelity and total_questions > _REPORT_CHUNK_SIZE:
+            # Map step: evaluate full answers chunk by chunk, then let the
+            # report prompt aggregate the per-chunk evaluations
+            interview_json = "\n\n".join(self._evaluate_interview_chunks(full_data))
+        else:
+            interview_json = json.dumps(compact_data)
+
         # Add behavioral summary to the prompt if provided
         behavioral_section = f"\n\n# Posture and Sentiment Analysis (from video):\n{behavioral_summary}\n" if behavioral_summary else ""
-        
-        # Count actual questions
-        total_questions = len(interview_data)
-        technical_questions = [item for item in interview_data if item["question_data"]["type"] == "technical"]
-        non_technical_questions = [item for item in interview_data if item["question_data"]["type"] == "non-technical"]
-        
-        prompt = f"""
-        You are an expert technical interviewer analyzing a completed interview. Provide a completely honest, evidence-based assessment.
-        
-        # Job Description:
-        {self.job_description}
-        
-        # Candidate's CV:
-        {self.cv}
-        
-        # Interview Data:
-        Total Questions: {total_questions}
-        Technical Questions: {len(technical_questions)}
-        Non-Technical Questions: {len(non_technical_questions)}
-        
-        # Detailed Q&A Analysis:
-        {interview_json}
-        {behavioral_section}
-        
-        ## EVALUATION TASK
-        Create a thorough, detailed, and critical feedback report for the candidate. Your evaluation must be rigorous, specific, and evidence-based.
-        
-        ## EVALUATION CRITERIA
-        For EACH answer, you must:
-        1. Assess factual correctness (Are there any errors or misconceptions?)
-        2. Evaluate completeness (Did they cover all important aspects?)
-        3. Check for depth of understanding (Do they show deep knowledge or just surface-level familiarity?)
-        4. Analyze communication clarity (Was the answer well-structured and clearly articulated?)
-        5. Identify specific strengths and weaknesses
-        
-        ## SCORING RUBRIC
-        For each question, assign a score from 0-10 based on these criteria:
-        - 0-2: Completely incorrect or irrelevant answer
-        - 3-4: Major gaps or errors, minimal understanding
-        - 5-6: Basic understanding with some errors or omissions
-        - 7-8: Good understanding with minor gaps or imprecisions
-        - 9-10: Excellent, comprehensive, and accurate answer
-        
-        ## REPORT STRUCTURE
-        Your report must include these sections:
-        
-        1. Overall Assessment: An objective summary of the candidate's performance
-        
-        2. Technical Skills Analysis:
-           - Evaluate EACH technical answer individually with specific feedback
-           - Identify patterns across technical answers
-           - Highlight factual errors, misconceptions, and knowledge gaps
-           - Be brutally honest in pointing out major flaws
-           - Use exact quotes from responses to highlight issues
-        
-        3. Non-Technical Skills Analysis:
-           - Evaluate EACH non-technical answer individually
-           - Assess communication skills, problem-solving approach, and self-awareness
-           - Directly reference parts of the answer to justify scores
-           - Be critical yet fair, highlighting specific language used
-        
-        4. Specific Improvement Areas:
-           - List 3-5 concrete areas where improvement is most needed
-           - For each area, provide specific examples from their answers
-           - Avoid generalities; focus on exact issues in understanding
-        
-        5. Actionable Development Plan:
-           - Recommend specific resources, courses, or activities
-           - Prioritize recommendations based on critical needs
-           - Suggest practical steps based on answer analysis
-        
-        6. Final Evaluation:
-           - Provide a clear hiring recommendation (Strongly Recommend, Recommend, Recommend with Reservations, Do Not Recommend)
-           - Justify your recommendation with specific evidence
-           - Make sure recommendations align with the overall analysis
-        
-        7. Detailed Scoring:
-           - Score each non-technical question (0-10)
-           - Score each technical question (0-10)
-           - Calculate averages for each category
-           - Calculate final score: (Non-Technical Average × 0.3) + (Technical Average × 0.7)
-           - Convert to percentage (0-100%)
-        
-        ## IMPORTANT REQUIREMENTS
-        - Be specific and reference actual answers in your feedback
-        - Do not be vague or generic - cite exact statements or omissions
-        - Be honest and critical - do not inflate scores or soften criticism
-        - Ensure mathematical accuracy in all score calculations
-        - Double-check that your evaluation is consistent with the scoring
-        
-        ## EXAMPLE EVALUATION FORMAT
-        For each answer evaluation, use this format:
-        
-        Question: [Question text]
-        Answer: [Answer text]
-        Evaluation:
-        - Factual Accuracy: [Assessment with specific examples from the answer]
-        - Completeness: [Assessment noting missing elements]
-        - Depth of Understanding: [Assessment of conceptual grasp]
-        - Communication: [Assessment of clarity and structure]
-        - Critical Issues: [Highlight major problems, misconceptions, or errors]
-        - Answer Quality: [Overall quality assessment with brutal honesty]
-        Score: [0-10]/10
-        Specific Feedback: [Concrete, harsh but fair criticism and improvement advice]
-        
-        ## EVALUATION APPROACH - PURELY DYNAMIC ANALYSIS
-        - Base your evaluation ONLY on the actual answers provided in the interview data above
-        - Quote exact phrases from the candidate's actual responses
-        - If behavioral analysis data is provided, incorporate those specific observations
-        - Do NOT use any pre-written or template responses
-        - Identify specific technical errors from the actual answers given
-        - Assess the actual communication style demonstrated in their responses
-        - Reference specific behavioral patterns observed during the video analysis
-        - Calculate scores based solely on the quality of actual responses provided
-        - If no meaningful answers were provided, state this explicitly
-        - Be completely honest about the actual performance demonstrated
-        """
+
+        prompt = self._report_template.substitute(
+            job_description=self.job_description,
+            cv=self.cv,
+            total=total_questions,
+            n_tech=num_technical,
+            n_nontech=num_non_technical,
+            interview_json=interview_json,
+            behavioral_section=behavioral_section,
+        )
         
         logger.info("\nGenerating comprehensive interview feedback report...")
         logger.info("This may take a moment...")
@@ -1278,47 +1343,104 @@ class AIInterviewer:
             # Use mock report for testing
             self.report = self._get_mock_report()
         
-        # Validate and fix the scoring if needed
-        self.report = self._validate_and_fix_scoring(self.report, interview_data)
+        # Validate and fix the scoring if needed; interview_data may already be
+        # consumed, compact_data carries the same question types
+        self.report = self._validate_and_fix_scoring(self.report, compact_data)
             
         logger.info("✓ Interview report generated")
         return self.report
 
+    def _evaluate_interview_chunks(self, interview_data: List[Dict]) -> List[str]:
+        """Evaluate full-length answers in fixed-size chunks, reusing cached evaluations."""
+        evaluations = []
+
+        for start in range(0, len(interview_data), _REPORT_CHUNK_SIZE):
+            chunk = interview_data[start:start + _REPORT_CHUNK_SIZE]
+            chunk_json = json.dumps(chunk)
+            key = hashlib.sha256(
+                "\x00".join((self.model, self.job_description or "", self.cv or "", chunk_json)).encode("utf-8")
+            ).hexdigest()
+
+            evaluation = _chunk_evaluation_cache.get(key)
+            if evaluation is None:
+                evaluation = self._evaluate_chunk(chunk_json, start + 1)
+                if evaluation is None:
+                    # Fall back to the truncated answers for this chunk
+                    evaluation = json.dumps([{**item, "answer": _truncate_answer(item["answer"])} for item in chunk])
+                else:
+                    if len(_chunk_evaluation_cache) >= _CHUNK_CACHE_MAX_ENTRIES:
+                        _chunk_evaluation_cache.pop(next(iter(_chunk_evaluation_cache)))
+                    _chunk_evaluation_cache[key] = evaluation
+
+            evaluations.append(evaluation)
+
+        return evaluations
+
+    def _evaluate_chunk(self, chunk_json: str, first_number: int) -> Optional[str]:
+        """Ask the LLM for per-question evaluations of one chunk. Returns None on failure."""
+        if not TOGETHER_AVAILABLE:
+            return None
+
+        prompt = f"""
+        Evaluate each of the following interview answers for the job below, starting at question {first_number}.
+        For each one give the question, a short evaluation of factual accuracy, completeness, depth and
+        communication, quote the most relevant phrases, and assign a score from 0-10.
+
+        # Job Description:
+        {self.job_description}
+
+        # Q&A:
+        {chunk_json}
+        """
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are an expert technical interviewer who evaluates each answer thoroughly and concisely."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=2000
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            logger.error(f"Error evaluating interview chunk: {e}")
+            return None
+
     def _validate_and_fix_scoring(self, report: str, interview_data: List[Dict]) -> str:
         """Validate and fix the scoring in the report with enhanced accuracy."""
         try:
             # Count the number of technical and non-technical questions
-            technical_questions = []
-            non_technical_questions = []
+            num_technical = 0
+            num_non_technical = 0
+            get_question_data = operator.itemgetter("question_data")
             
             for item in interview_data:
-                q_type = item["question_data"]["type"]
+                q_type = get_question_data(item)["type"]
                 if q_type == "technical":
-                    technical_questions.append(item)
+                    num_technical += 1
                 elif q_type == "non-technical":
-                    non_technical_questions.append(item)
+                    num_non_technical += 1
             
             # Extract individual scores from the report
             non_tech_scores = []
             tech_scores = []
             
-            # Look for score patterns like "Score: 7/10" or "Score: 7.5/10"
-            score_pattern = r'Score:\s*(\d+(\.\d+)?)/10'
-            
-            # Extract all scores
-            all_scores = re.findall(score_pattern, report)
+            # Extract all scores, e.g. "Score: 7/10" or "Score: 7.5/10"
+            all_scores = _ITEM_SCORE_RE.findall(report)
             all_scores = [float(score[0]) for score in all_scores]
             
             # If we found enough scores, separate them into technical and non-technical
-            if len(all_scores) >= len(technical_questions) + len(non_technical_questions):
+            if len(all_scores) >= num_technical + num_non_technical:
                 # Assume first scores are non-technical, rest are technical
-                non_tech_scores = all_scores[:len(non_technical_questions)]
-                tech_scores = all_scores[len(non_technical_questions):len(non_technical_questions) + len(technical_questions)]
+                non_tech_scores = all_scores[:num_non_technical]
+                tech_scores = all_scores[num_non_technical:num_non_technical + num_technical]
             
             # Extract the reported averages
-            non_tech_avg_match = re.search(r'Non-Technical Average[^\d]*(\d+(\.\d+)?)', report)
-            tech_avg_match = re.search(r'Technical Average[^\d]*(\d+(\.\d+)?)', report)
-            final_score_match = re.search(r'Final Score:?\s*(\d+(\.\d+)?)', report)
+            non_tech_avg_match = _NON_TECH_AVG_RE.search(report)
+            tech_avg_match = _TECH_AVG_RE.search(report)
+            final_score_match = _FINAL_SCORE_RE.search(report)
             
             reported_non_tech_avg = 0
             reported_tech_avg = 0
@@ -1385,32 +1507,26 @@ class AIInterviewer:
 """
                 
                 # Try to replace the existing scoring section
-                scoring_section_match = re.search(r'## Detailed Scoring.*?Final Score:.*?%', report, re.DOTALL)
+                scoring_section_match = _SCORING_SECTION_RE.search(report)
                 if scoring_section_match:
                     report = report.replace(scoring_section_match.group(0), new_scoring_section.strip())
                 else:
                     # If we can't find the scoring section, append it to the end
                     report += "\n\n" + new_scoring_section
                 
-                # Also fix any references to the scores in the text
+                # Also fix any references to the scores in the text, but only
+                # for figures the model actually reported
+                replacements = {}
                 if non_tech_avg_match:
-                    report = re.sub(
-                        r'Non-Technical Average[^\d]*(\d+(\.\d+)?)',
-                        f'Non-Technical Average: {correct_non_tech_avg:.1f}',
-                        report
-                    )
-                
+                    replacements['non_tech'] = f'Non-Technical Average: {correct_non_tech_avg:.1f}'
                 if tech_avg_match:
-                    report = re.sub(
-                        r'Technical Average[^\d]*(\d+(\.\d+)?)',
-                        f'Technical Average: {correct_tech_avg:.1f}',
-                        report
-                    )
-                
+                    replacements['tech'] = f'Technical Average: {correct_tech_avg:.1f}'
                 if final_score_match:
-                    report = re.sub(
-                        r'Final Score:?\s*(\d+(\.\d+)?)',
-                        f'Final Score: {correct_final_score:.1f}',
+                    replacements['final'] = f'Final Score: {correct_final_score:.1f}'
+                
+                if replacements:
+                    report = _SCORE_FIELDS_RE.sub(
+                        lambda m: replacements.get(m.lastgroup, m.group(0)),
                         report
                     )
         
@@ -1,6 +1,6 @@
 import json
+import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
 from .models import Interview
 from .ai_interviewer import AIInterviewer
 
@@ -25,9 +25,19 @@ class InterviewConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
-    async def receive(self, text_data):
-        """Handle incoming WebSocket messages."""
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handle incoming WebSocket messages.
+
+        Binary frames carry raw 16 kHz int16 audio; text frames carry JSON
+        control messages.
+        """
         try:
+            if bytes_data:
+                text = await self.process_voice_data(bytes_data)
+                if text:
+                    await self.send_voice_text(text)
+                return
+
             text_data_json = json.loads(text_data)
             message_type = text_data_json.get('type')
             
@@ -60,16 +70,7 @@ class InterviewConsumer(AsyncWebsocketConsumer):
                     # Process voice data and convert to text
                     text = await self.process_voice_data(voice_data)
                     if text:
-                        await self.channel_layer.group_send(
-                            self.room_group_name,
-                            {
-                                'type': 'interview.message',
-                                'message': {
-                                    'type': 'voice_text',
-                                    'text': text
-                                }
-                            }
-                        )
+                        await self.send_voice_text(text)
         except Exception as e:
             await self.send(text_data=json.dumps({
                 'type': 'error',
@@ -80,8 +81,20 @@ class InterviewConsumer(AsyncWebsocketConsumer):
         """Send message to WebSocket."""
         await self.send(text_data=json.dumps(event['message']))
 
-    @database_sync_to_async
-    def process_voice_data(self, voice_data):
+    async def send_voice_text(self, text):
+        """Broadcast recognized speech to the interview group."""
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'interview.message',
+                'message': {
+                    'type': 'voice_text',
+                    'text': text
+                }
+            }
+        )
+
+    async def process_voice_data(self, voice_data):
         """Process voice data and convert to text."""
         try:
             # Get the AI interviewer instance
@@ -89,9 +102,12 @@ class InterviewConsumer(AsyncWebsocketConsumer):
             ai_interviewer = ai_interviewers.get(self.interview_id)
             
             if ai_interviewer and ai_interviewer.voice_manager:
-                # Convert voice data to text using the voice manager
-                text = ai_interviewer.voice_manager.process_voice_data(voice_data)
-                return text
+                # Speech recognition doesn't touch the database, so run it on the
+                # default executor instead of the thread reserved for ORM work
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, ai_interviewer.voice_manager.process_voice_data, voice_data
+                )
         except Exception as e:
             print(f"Error processing voice data: {e}")
-            return None 
\ No newline at end of file
+        return None
@@ -1,26 +1,177 @@
 # -*- coding: utf-8 -*-
 __all__ = ['EfficientEmotionDetector']
+import logging
+import os
+import threading
+from functools import lru_cache
 import cv2
 import numpy as np
-from collections import deque
+from .emotion_scorer import EMOTION_NAMES, EMOTION_TO_CODE, pack_features, score_features
 
 FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
 EYE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_eye.xml'
 MOUTH_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_smile.xml'
+FACE_SCAN_WIDTH = 320
+# Worker threads for OpenCV's parallel_for_ (cascade scans, resize, cvtColor)
+OPENCV_THREADS = min(4, os.cpu_count() or 1)
+
+# Rows covered by the annotation text block drawn in the top-left corner
+TEXT_LAYER_HEIGHT = 160
+
+logger = logging.getLogger('emotion_detector')
+
+# Optional YuNet face detector (OpenCV zoo face_detection_yunet.onnx). When the
+# model file is present one DNN pass replaces the face/eye/mouth cascade scans;
+# otherwise the Haar cascades bundled with opencv-python are used. The model is
+# not shipped with the repo; to enable it, download
+# https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx
+# and save it as home/face_detection_yunet.onnx (needs OpenCV >= 4.8).
+YUNET_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'face_detection_yunet.onnx')
+DNN_INPUT_WIDTH = 320
+
+# Eye and mouth boxes derived from YuNet landmarks, sized so a relaxed frontal
+# face lands in the same feature ranges the cascade boxes produce
+EYE_BOX_SCALE = 0.125    # eye box side as a fraction of the inter-eye distance
+MOUTH_BOX_ASPECT = 0.15  # mouth box height as a fraction of its width
+
+# The active face detector is logged by the first detector built in the process
+_detector_logged = False
+_detector_log_lock = threading.Lock()
+
+
+def _log_face_detector(name):
+    global _detector_logged
+    with _detector_log_lock:
+        if _detector_logged:
+            return
+        _detector_logged = True
+    logger.info(f"Emotion detector using {name} face detection")
+
+@lru_cache(maxsize=256)
+def _fmt_main(emotion, score):
+    return f"Emotion: {emotion} (Score: {score})"
+
+
+@lru_cache(maxsize=256)
+def _fmt_eyes(num_eyes, eye_pos):
+    return f"Eyes: {num_eyes}, Eye pos: {eye_pos:.2f}"
+
+
+@lru_cache(maxsize=256)
+def _fmt_mouth(detected, size):
+    return f"Mouth: {detected}, Size: {size:.3f}"
+
+
+@lru_cache(maxsize=256)
+def _fmt_score(emotion, score):
+    return f"{emotion}: {score}"
+
 
 class EfficientEmotionDetector:
     """
     Efficient emotion detection with realistic, detectable thresholds.
     """
-    def __init__(self):
+    # Smoothing weights, newest frame first
+    _WEIGHTS = np.array([1.0, 0.8, 0.6, 0.4, 0.2])
+
+    def __init__(self, use_opencl=False):
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(OPENCV_THREADS)
+        # Opt-in T-API path: the face cascade scans a UMat so OpenCL can run it on the GPU
+        self._use_umat = bool(use_opencl and hasattr(cv2, 'ocl') and cv2.ocl.haveOpenCL())
         self.face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+        self._scan_width = None
+        self._scan_scale = 1.0
         self.eye_cascade = cv2.CascadeClassifier(EYE_CASCADE_PATH)
         self.mouth_cascade = cv2.CascadeClassifier(MOUTH_CASCADE_PATH)
-        self.emotion_history = deque(maxlen=5)
+        # Ring of emotion codes, newest at index 0
+        self._hist = np.zeros(len(self._WEIGHTS), dtype=np.uint8)
+        self._hist_len = 0
+        # Rendered annotation text, reused while the displayed values are unchanged
+        self._text_key = None
+        self._text_box = None
+        self._text_keep = None
+        self._text_premult = None
+        self.face_net = None
+        self._dnn_input_size = None
+        if os.path.exists(YUNET_MODEL_PATH) and hasattr(cv2, 'FaceDetectorYN_create'):
+            try:
+                self.face_net = cv2.FaceDetectorYN_create(YUNET_MODEL_PATH, "", (DNN_INPUT_WIDTH, 240))
+            except cv2.error as e:
+                logger.warning(f"Could not load YuNet model {YUNET_MODEL_PATH}: {e}")
+                self.face_net = None
+        _log_face_detector("YuNet DNN" if self.face_net is not None else "Haar cascade")
+
+    def detect_face_features(self, bgr, gray=None):
+        """Return (face_box, eyes, mouth) for the largest face, or None if no face is found.
+
+        A precomputed grayscale frame can be passed for the cascade path; bgr is
+        only needed when the YuNet detector is loaded.
+        """
+        if self.face_net is not None:
+            return self.detect_face_dnn(bgr)
+        if gray is None:
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        face_box = self.detect_face(gray)
+        if face_box is None:
+            return None
+        eyes, mouth = self.detect_features(gray, face_box)
+        return face_box, eyes, mouth
+
+    def detect_face_dnn(self, bgr):
+        """Detect the face with YuNet on a downscaled frame and derive eye/mouth boxes from its landmarks."""
+        frame_h, frame_w = bgr.shape[:2]
+        small_h = max(1, round(frame_h * DNN_INPUT_WIDTH / frame_w))
+        if self._dnn_input_size != (DNN_INPUT_WIDTH, small_h):
+            self._dnn_input_size = (DNN_INPUT_WIDTH, small_h)
+            self.face_net.setInputSize(self._dnn_input_size)
+        small = cv2.resize(bgr, self._dnn_input_size, interpolation=cv2.INTER_AREA)
+        _, faces = self.face_net.detect(small)
+        if faces is None or len(faces) == 0:
+            return None
+
+        # Rows are: box (4), right eye, left eye, nose, right and left mouth corners (2 each), score
+        best = max(faces, key=lambda f: f[2] * f[3])
+        scale = frame_w / DNN_INPUT_WIDTH
+        pts = best[:14] * scale
+        x, y, w, h = (int(v) for v in pts[:4])
+        face_box = (x, y, w, h)
+
+        eye_points = ((pts[4], pts[5]), (pts[6], pts[7]))  # image-left eye first
+        eye_dist = max(1.0, abs(pts[4] - pts[6]))
+        side = max(1, int(eye_dist * EYE_BOX_SCALE))
+        eyes = [(int(ex) - side // 2, int(ey) - side // 2, side, side) for ex, ey in eye_points]
+
+        mouth_left = min(pts[10], pts[12])
+        mw = max(1, int(abs(pts[12] - pts[10])))
+        mh = max(1, int(mw * MOUTH_BOX_ASPECT))
+        mouth_cy = (pts[11] + pts[13]) / 2
+        mouth = (int(mouth_left), int(mouth_cy) - mh // 2, mw, mh)
+        return face_box, eyes, mouth
 
     def detect_face(self, gray):
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5, minSize=(100, 100))
+        # Scan a copy downscaled to FACE_SCAN_WIDTH and map the boxes back
+        frame_w = gray.shape[1]
+        if self._scan_width != frame_w:
+            self._scan_width = frame_w
+            self._scan_scale = min(1.0, FACE_SCAN_WIDTH / frame_w)
+        scale = self._scan_scale
+        if scale < 1.0:
+            small_gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            small_gray = gray
+        min_side = max(20, int(100 * scale))
+        faces = None
+        if self._use_umat:
+            try:
+                faces = self.face_cascade.detectMultiScale(cv2.UMat(small_gray), 1.2, 4, minSize=(min_side, min_side))
+            except cv2.error:
+                self._use_umat = False
+        if faces is None:
+            faces = self.face_cascade.detectMultiScale(small_gray, 1.2, 4, minSize=(min_side, min_side))
         if len(faces) > 0:
+            if scale < 1.0:
+                faces = [tuple(int(v / scale) for v in f) for f in faces]
             valid_faces = [f for f in faces if f[0] > 10 and f[1] > 10 
                          and f[0] + f[2] < gray.shape[1] - 10 
                          and f[1] + f[3] < gray.shape[0] - 10]
@@ -29,9 +180,21 @@ class EfficientEmotionDetector:
             return max(faces, key=lambda f: f[2] * f[3])
         return None
 
+    def detect_features(self, gray, face_box):
+        """Scan for eyes and mouth in one contiguous copy of the face region."""
+        x, y, w, h = face_box
+        face_roi = np.ascontiguousarray(gray[y:y+h, x:x+w])
+        # Full-width row ranges of a contiguous block are contiguous too
+        eyes = self._scan_eyes(face_roi[:h//2], face_box)
+        mouth = self._scan_mouth(face_roi[int(h * 0.6):], face_box)
+        return eyes, mouth
+
     def detect_eyes(self, gray, face_box):
         x, y, w, h = face_box
-        roi_gray = gray[y:y+h//2, x:x+w]
+        return self._scan_eyes(gray[y:y+h//2, x:x+w], face_box)
+
+    def _scan_eyes(self, roi_gray, face_box):
+        x, y, w, h = face_box
         eyes = self.eye_cascade.detectMultiScale(
             roi_gray, 1.15, 4,
             minSize=(w//12, h//12),
@@ -51,26 +214,22 @@ class EfficientEmotionDetector:
         return sorted(eyes, key=lambda e: e[2]*e[3], reverse=True)[:2]
 
     def detect_mouth(self, gray, face_box):
+        x, y, w, h = face_box
+        return self._scan_mouth(gray[y + int(h * 0.6):y+h, x:x+w], face_box)
+
+    def _scan_mouth(self, roi_gray, face_box):
         x, y, w, h = face_box
         roi_y = y + int(h * 0.6)
-        roi_h = y + h - roi_y
-        roi_gray = gray[roi_y:y+h, x:x+w]
-        mouth_params = [
-            (1.7, 11, w//4, h//4),
-            (1.5, 13, w//5, h//5),
-            (1.9, 9, w//3, h//3)
-        ]
-        for scale, neighbors, min_w, min_h in mouth_params:
-            mouths = self.mouth_cascade.detectMultiScale(
-                roi_gray, scale, neighbors,
-                minSize=(min_w, min_h),
-                maxSize=(w, h//2)
-            )
-            if len(mouths) > 0:
-                center_x = w // 2
-                mx, my, mw, mh = min(mouths, 
-                    key=lambda m: abs((m[0] + m[2]//2) - center_x))
-                return (x+mx, roi_y+my, mw, mh)
+        mouths = self.mouth_cascade.detectMultiScale(
+            roi_gray, 1.5, 11,
+            minSize=(w//5, h//5),
+            maxSize=(w, h//2)
+        )
+        if len(mouths) > 0:
+            center_x = w // 2
+            mx, my, mw, mh = min(mouths, 
+                key=lambda m: abs((m[0] + m[2]//2) - center_x))
+            return (x+mx, roi_y+my, mw, mh)
         return None
 
     def calculate_simple_features(self, gray, face_box, eyes, mouth):
@@ -87,9 +246,10 @@ class EfficientEmotionDetector:
             'face_ratio': w / h
         }
         if eyes:
-            total_eye_height = sum(eh for _, _, _, eh in eyes)
-            total_eye_width = sum(ew for _, _, ew, _ in eyes)
-            avg_eye_y = sum(ey for _, ey, _, _ in eyes) / len(eyes)
+            eyes_arr = np.asarray(eyes, dtype=np.int32).reshape(-1, 4)
+            total_eye_height = int(eyes_arr[:, 3].sum())
+            total_eye_width = int(eyes_arr[:, 2].sum())
+            avg_eye_y = float(eyes_arr[:, 1].mean())
             features['eye_height_ratio'] = total_eye_height / h
             features['eye_width_ratio'] = total_eye_width / w
             features['eye_vertical_pos'] = (avg_eye_y - y) / h
@@ -101,61 +261,8 @@ class EfficientEmotionDetector:
         return features
 
     def classify_emotion_simple(self, features):
-        scores = {
-            'Happy': 0,
-            'Sad': 0,
-            'Angry': 0,
-            'Surprised': 0,
-            'Neutral': 0,
-            'Confused': 0,
-            'Disgusted': 0
-        }
-        if features['mouth_detected']:
-            if 0.016 < features['mouth_size_ratio'] < 0.045 and 0.25 < features['mouth_width_ratio'] < 0.52:
-                scores['Happy'] += 5
-            if 0.53 < features['mouth_vertical_pos'] < 0.72:
-                scores['Happy'] += 2
-            if features['eye_height_ratio'] > 0.10:
-                scores['Happy'] += 1
-            if features['mouth_width_ratio'] > 0.38 and features['mouth_vertical_pos'] < 0.65:
-                scores['Happy'] += 2
-        if features['eye_height_ratio'] > 0.16 and features['mouth_detected'] and features['mouth_size_ratio'] > 0.03:
-            scores['Surprised'] += 4
-        elif features['eye_height_ratio'] > 0.14:
-            scores['Surprised'] += 2
-        if features['mouth_detected'] and features['mouth_size_ratio'] < 0.012:
-            scores['Sad'] += 2
-        if 0.23 < features['eye_vertical_pos'] < 0.32:
-            scores['Sad'] += 2
-        if features['mouth_detected'] and features['mouth_vertical_pos'] > 0.68:
-            scores['Sad'] += 1
-        if not features['mouth_detected']:
-            scores['Angry'] += 2
-        if features['eye_height_ratio'] < 0.08 and 0.18 < features['eye_vertical_pos'] < 0.23:
-            scores['Angry'] += 3
-        if features['face_ratio'] > 0.92:
-            scores['Angry'] += 1
-        if features['num_eyes'] < 2:
-            scores['Confused'] += 2
-        if 0.16 < features['eye_vertical_pos'] < 0.19:
-            scores['Confused'] += 1
-        if features['mouth_detected'] and 0.008 < features['mouth_size_ratio'] < 0.015:
-            scores['Confused'] += 2
-        if features['mouth_detected'] and features['mouth_size_ratio'] < 0.01:
-            scores['Disgusted'] += 2
-        if features['mouth_detected'] and features['mouth_vertical_pos'] > 0.72:
-            scores['Disgusted'] += 2
-        if features['eye_height_ratio'] < 0.055:
-            scores['Disgusted'] += 1
-        neutral_conditions = [
-            features['mouth_detected'],
-            0.013 < features['mouth_size_ratio'] < 0.022,
-            0.18 < features['eye_vertical_pos'] < 0.22,
-            0.08 < features['eye_height_ratio'] < 0.12,
-            0.32 < features['mouth_width_ratio'] < 0.41
-        ]
-        if all(neutral_conditions):
-            scores['Neutral'] += 6
+        raw_scores = score_features(pack_features(features))
+        scores = dict(zip(EMOTION_NAMES, raw_scores.tolist()))
         max_score = max(scores.values())
         if max_score < 3:
             return 'Neutral', scores
@@ -167,19 +274,20 @@ class EfficientEmotionDetector:
         return max_emotions[0], scores
 
     def smooth_emotion(self, emotion):
-        self.emotion_history.append(emotion)
-        if len(self.emotion_history) < 3:
+        hist = self._hist
+        hist[1:] = hist[:-1]
+        hist[0] = EMOTION_TO_CODE[emotion]
+        n = self._hist_len = min(self._hist_len + 1, len(hist))
+        if n < 3:
             return emotion
-        weights = [1.0, 0.8, 0.6, 0.4, 0.2]
-        emotion_scores = {}
-        for i, e in enumerate(reversed(self.emotion_history)):
-            if i >= len(weights):
-                break
-            emotion_scores[e] = emotion_scores.get(e, 0) + weights[i]
-        current = self.emotion_history[-2] if len(self.emotion_history) > 1 else emotion
-        max_emotion = max(emotion_scores.items(), key=lambda x: x[1])
-        threshold = emotion_scores.get(current, 0) * 1.3 if current != 'Neutral' else 0
-        return max_emotion[0] if max_emotion[1] > threshold else current
+        recent = hist[:n]
+        scores = np.bincount(recent, weights=self._WEIGHTS[:n], minlength=len(EMOTION_NAMES))
+        max_score = scores.max()
+        # Ties go to the most recently seen emotion
+        best = next(int(c) for c in recent if scores[c] == max_score)
+        current = int(hist[1])
+        threshold = scores[current] * 1.3 if EMOTION_NAMES[current] != 'Neutral' else 0
+        return EMOTION_NAMES[best] if max_score > threshold else EMOTION_NAMES[current]
 
     def draw_annotations(self, frame, face_box, eyes, mouth, emotion, scores, features):
         x, y, w, h = face_box
@@ -190,17 +298,57 @@ class EfficientEmotionDetector:
             mx, my, mw, mh = mouth
             cv2.rectangle(frame, (mx, my), (mx+mw, my+mh), (255, 0, 255), 2)
         max_score = max(scores.values())
-        cv2.putText(frame, f"Emotion: {emotion} (Score: {max_score})", 
-                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        sorted_emotions = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:4]
+        # Values are rounded to their displayed precision, so equal keys mean identical text
+        eye_pos = round(features['eye_vertical_pos'], 2)
+        mouth_size = round(features['mouth_size_ratio'], 3)
+        text_key = (
+            frame.shape[1], emotion, max_score,
+            features['num_eyes'], eye_pos,
+            features['mouth_detected'], mouth_size,
+            tuple(sorted_emotions),
+        )
+        if text_key != self._text_key:
+            self._render_text_layer(frame.shape[1], emotion, max_score, features['num_eyes'], eye_pos,
+                                    features['mouth_detected'], mouth_size, sorted_emotions)
+            self._text_key = text_key
+        if self._text_box is None:
+            return
+        y0, y1, x0, x1 = self._text_box
+        y1 = min(y1, frame.shape[0])
+        if y1 <= y0:
+            return
+        # Alpha-composite the premultiplied text over the frame: roi * (1 - coverage) + text
+        roi = frame[y0:y1, x0:x1]
+        cv2.add(cv2.multiply(roi, self._text_keep[:y1 - y0], scale=1 / 255.0),
+                self._text_premult[:y1 - y0], dst=roi)
+
+    def _render_text_layer(self, width, emotion, max_score, num_eyes, eye_pos, mouth_detected, mouth_size,
+                           sorted_emotions):
+        """Rasterize the annotation text once; frames with the same values reuse it."""
+        layer = np.zeros((TEXT_LAYER_HEIGHT, width, 3), dtype=np.uint8)
+        coverage = np.zeros((TEXT_LAYER_HEIGHT, width), dtype=np.uint8)
+
+        def put_text(text, org, font_scale, color, thickness):
+            cv2.putText(layer, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+            cv2.putText(coverage, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+
+        put_text(_fmt_main(emotion, max_score), (10, 30), 0.8, (0, 255, 255), 2)
         info_y = 60
-        cv2.putText(frame, f"Eyes: {features['num_eyes']}, Eye pos: {features['eye_vertical_pos']:.2f}", 
-                   (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        put_text(_fmt_eyes(num_eyes, eye_pos), (10, info_y), 0.5, (200, 200, 200), 1)
         info_y += 20
-        cv2.putText(frame, f"Mouth: {features['mouth_detected']}, Size: {features['mouth_size_ratio']:.3f}", 
-                   (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        put_text(_fmt_mouth(mouth_detected, mouth_size), (10, info_y), 0.5, (200, 200, 200), 1)
         info_y += 20
-        sorted_emotions = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:4]
         for i, (emo, score) in enumerate(sorted_emotions):
             if score > 0:
-                cv2.putText(frame, f"{emo}: {score}", 
-                           (10, info_y + i*15), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (150, 150, 150), 1)
+                put_text(_fmt_score(emo, score), (10, info_y + i*15), 0.4, (150, 150, 150), 1)
+
+        # Text drawn on black is already premultiplied by its coverage
+        rows, cols = np.nonzero(coverage)
+        if len(rows) == 0:
+            self._text_box = None
+            return
+        y0, y1, x0, x1 = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+        self._text_box = (y0, y1, x0, x1)
+        self._text_keep = cv2.merge([255 - coverage[y0:y1, x0:x1]] * 3)
+        self._text_premult = layer[y0:y1, x0:x1].copy()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled emotion scoring for EfficientEmotionDetector.
+
+The classify_emotion_simple rules are a bounds table evaluated over a
+fixed-order feature vector in one vectorized pass. Numba compiles the pass to
+native code; without Numba the same NumPy code runs uncompiled.
+"""
+__all__ = ['EMOTION_NAMES', 'EMOTION_TO_CODE', 'NUM_FEATURES', 'pack_features', 'score_features', 'warm_up']
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Score array order; matches the order of the scores dict returned by classify_emotion_simple
+EMOTION_NAMES = ('Happy', 'Sad', 'Angry', 'Surprised', 'Neutral', 'Confused', 'Disgusted')
+EMOTION_TO_CODE = {name: code for code, name in enumerate(EMOTION_NAMES)}
+
+# Feature vector layout
+F_MOUTH_DETECTED = 0
+F_MOUTH_SIZE = 1
+F_MOUTH_WIDTH = 2
+F_MOUTH_VPOS = 3
+F_EYE_HEIGHT = 4
+F_EYE_VPOS = 5
+F_NUM_EYES = 6
+F_FACE_RATIO = 7
+NUM_FEATURES = 8
+
+
+def pack_features(features):
+    """Pack a calculate_simple_features dict into the scorer's feature vector.
+
+    float64 keeps the thresholds bit-identical to the Python comparisons;
+    float32 would move values that sit on a boundary such as 0.1.
+    """
+    return np.array([
+        1.0 if features['mouth_detected'] else 0.0,
+        features['mouth_size_ratio'],
+        features['mouth_width_ratio'],
+        features['mouth_vertical_pos'],
+        features['eye_height_ratio'],
+        features['eye_vertical_pos'],
+        features['num_eyes'],
+        features['face_ratio'],
+    ], dtype=np.float64)
+
+
+_INF = np.inf
+_PRESENT = (0.5, _INF)   # mouth_detected is True
+_ABSENT = (-_INF, 0.5)   # mouth_detected is False
+
+# Scoring rules as (emotion, points, {feature: (lo, hi)}). A rule fires when
+# lo < feature < hi holds for each listed feature. The old "if A: +4 elif B: +2"
+# Surprised rule is two +2 rules because A implies B.
+_RULE_SPECS = (
+    ('Happy', 5, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (0.016, 0.045), F_MOUTH_WIDTH: (0.25, 0.52)}),
+    ('Happy', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_VPOS: (0.53, 0.72)}),
+    ('Happy', 1, {F_MOUTH_DETECTED: _PRESENT, F_EYE_HEIGHT: (0.10, _INF)}),
+    ('Happy', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_WIDTH: (0.38, _INF), F_MOUTH_VPOS: (-_INF, 0.65)}),
+    ('Surprised', 2, {F_EYE_HEIGHT: (0.14, _INF)}),
+    ('Surprised', 2, {F_EYE_HEIGHT: (0.16, _INF), F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (0.03, _INF)}),
+    ('Sad', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (-_INF, 0.012)}),
+    ('Sad', 2, {F_EYE_VPOS: (0.23, 0.32)}),
+    ('Sad', 1, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_VPOS: (0.68, _INF)}),
+    ('Angry', 2, {F_MOUTH_DETECTED: _ABSENT}),
+    ('Angry', 3, {F_EYE_HEIGHT: (-_INF, 0.08), F_EYE_VPOS: (0.18, 0.23)}),
+    ('Angry', 1, {F_FACE_RATIO: (0.92, _INF)}),
+    ('Confused', 2, {F_NUM_EYES: (-_INF, 2)}),
+    ('Confused', 1, {F_EYE_VPOS: (0.16, 0.19)}),
+    ('Confused', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (0.008, 0.015)}),
+    ('Disgusted', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (-_INF, 0.01)}),
+    ('Disgusted', 2, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_VPOS: (0.72, _INF)}),
+    ('Disgusted', 1, {F_EYE_HEIGHT: (-_INF, 0.055)}),
+    ('Neutral', 6, {F_MOUTH_DETECTED: _PRESENT, F_MOUTH_SIZE: (0.013, 0.022), F_EYE_VPOS: (0.18, 0.22),
+                    F_EYE_HEIGHT: (0.08, 0.12), F_MOUTH_WIDTH: (0.32, 0.41)}),
+)
+
+
+def _build_rules(specs):
+    lo = np.full((len(specs), NUM_FEATURES), -_INF)
+    hi = np.full((len(specs), NUM_FEATURES), _INF)
+    emotion = np.empty(len(specs), dtype=np.int64)
+    points = np.empty(len(specs), dtype=np.float64)
+    for r, (name, pts, bounds) in enumerate(specs):
+        emotion[r] = EMOTION_NAMES.index(name)
+        points[r] = pts
+        for f, (f_lo, f_hi) in bounds.items():
+            lo[r, f] = f_lo
+            hi[r, f] = f_hi
+    return lo, hi, emotion, points
+
+
+RULE_LO, RULE_HI, RULE_EMOTION, RULE_POINTS = _build_rules(_RULE_SPECS)
+
+
+@njit(cache=True)
+def score_features(feat):
+    # Every rule is tested at once; unlisted features have infinite bounds and always pass
+    passed = ((feat > RULE_LO) & (feat < RULE_HI)).sum(axis=1)
+    hits = passed == NUM_FEATURES
+    scores = np.bincount(RULE_EMOTION[hits], weights=RULE_POINTS[hits], minlength=7)
+    return scores.astype(np.int32)
+
+
+def warm_up():
+    """Compile (or load the cached) scorer before the first frame arrives."""
+    score_features(np.zeros(NUM_FEATURES, dtype=np.float64))
@@ -0,0 +1,26 @@
+"""
+Extracted JD/CV text cached between requests.
+"""
+import hashlib
+import os
+
+from django.core.cache import cache
+
+# How long extracted text stays cached (seconds)
+FILE_TEXT_TIMEOUT = 3600
+
+
+def get_file_text(path, interviewer):
+    """Return interviewer.load_file_content(path), reusing the text until the file changes.
+
+    The key includes the file's mtime and size, so re-uploading over the same
+    path misses the old entry instead of serving stale text.
+    """
+    stat = os.stat(path)
+    path_hash = hashlib.md5(path.encode('utf-8', 'surrogatepass')).hexdigest()
+    key = f'jdcv:{path_hash}:{stat.st_mtime_ns}:{stat.st_size}'
+    text = cache.get(key)
+    if text is None:
+        text = interviewer.load_file_content(path)
+        cache.set(key, text, FILE_TEXT_TIMEOUT)
+    return text
@@ -1,10 +1,12 @@
 import cv2
 import numpy as np
 import threading
+import queue
 from collections import deque, Counter
 from datetime import datetime
 import mediapipe as mp
 from .emotion_detector import EfficientEmotionDetector
+from .emotion_scorer import warm_up as warm_up_emotion_scorer
 from .posture_analyzer import MediaPipePostureAnalyzer
 
 # Haar cascade paths
@@ -13,21 +15,67 @@ EYE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_eye.xml'
 MOUTH_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_smile.xml'
 UPPERBODY_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_upperbody.xml'
 
+# MediaPipe resizes to its own input anyway; a small copy means less to convert and copy
+POSTURE_INPUT_SIZE = (320, 240)
+
+WINDOW_NAME = "Interview Simulation"
+PREVIEW_SIZE = (480, 360)
+
+# Requested capture format. MJPG keeps UVC webcams off the raw YUYV path, which
+# moves twice the bytes per frame at 640x480.
+CAPTURE_FOURCC = 'MJPG'
+CAPTURE_SIZE = (640, 480)
+CAPTURE_FPS = 30
+
 class InterviewMonitor:
-    def __init__(self):
+    def __init__(self, show_ui=False):
+        # Headless by default; show_ui opens the OpenCV preview window with its toggle buttons
+        self.show_ui = show_ui
+        self._stop_event = threading.Event()
+        self._preview_scale = (1.0, 1.0)
         self.emotion_detector = EfficientEmotionDetector()
+        warm_up_emotion_scorer()  # compile before the capture loop starts
         self.posture_analyzer = MediaPipePostureAnalyzer()
         self.enable_emotion = True
         self.enable_posture = True
-        self.log = []  # List of (timestamp, emotion, posture)
+        # Per-frame log stored column-wise; see the log property
+        self._log_ts = []
+        self._log_emotion = []
+        self._log_posture = []
+        # Running tallies so summarize() doesn't rescan the log
+        self._emo_counter = Counter()
+        self._post_counter = Counter()
         self.running = True
+        # Emotion runs on even frames and posture on odd frames; the other
+        # modality reuses its last result
+        self._frame_idx = 0
+        self._last_emotion = None
+        self._last_posture = None
+        # Detections behind those results, redrawn on every preview frame so the
+        # overlays don't flicker between the two modalities
+        self._last_face = None  # (face_box, eyes, mouth, emotion, scores, features)
+        self._last_pose_results = None
+        # Capture thread hands the newest frame to run(); None marks end of stream
+        self._frame_q = queue.Queue(maxsize=1)
+        self._capture_thread = None
+        # Conversion buffers reused across frames
+        self._gray_buf = None
+        self._small_buf = None
+        self._rgb_buf = None
         self.toggle_rects = {
             'emotion': ((10, 370), (210, 410)),
             'posture': ((220, 370), (420, 410))
         }
 
+    def stop(self):
+        """Ask a running monitor to finish; safe to call from another thread."""
+        self._stop_event.set()
+
     def _handle_mouse(self, event, x, y, flags, param):
         if event == cv2.EVENT_LBUTTONDOWN:
+            # Clicks arrive in preview coordinates; the toggle rects are in frame coordinates
+            x = int(x * self._preview_scale[0])
+            y = int(y * self._preview_scale[1])
             for key, (pt1, pt2) in self.toggle_rects.items():
                 if pt1[0] <= x <= pt2[0] and pt1[1] <= y <= pt2[1]:
                     if key == 'emotion':
@@ -35,38 +83,79 @@ class InterviewMonitor:
                     elif key == 'posture':
                         self.enable_posture = not self.enable_posture
 
-    def analyze_sentiment(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        face_box = self.emotion_detector.detect_face(gray)
-        if face_box is not None:
-            eyes = self.emotion_detector.detect_eyes(gray, face_box)
-            mouth = self.emotion_detector.detect_mouth(gray, face_box)
-            features = self.emotion_detector.calculate_simple_features(gray, face_box, eyes, mouth)
+    def _reuse_buffer(self, attr, shape):
+        buf = getattr(self, attr)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            setattr(self, attr, buf)
+        return buf
+
+    def analyze_sentiment(self, frame, gray=None):
+        if gray is None and self.emotion_detector.face_net is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._reuse_buffer('_gray_buf', frame.shape[:2]))
+        located = self.emotion_detector.detect_face_features(frame, gray)
+        if located is not None:
+            face_box, eyes, mouth = located
+            features = self.emotion_detector.calculate_simple_features(None, face_box, eyes, mouth)
             emotion, scores = self.emotion_detector.classify_emotion_simple(features)
             smoothed_emotion = self.emotion_detector.smooth_emotion(emotion)
-            self.emotion_detector.draw_annotations(frame, face_box, eyes, mouth, smoothed_emotion, scores, features)
+            self._last_face = (face_box, eyes, mouth, smoothed_emotion, scores, features)
             return smoothed_emotion
+        self._last_face = None
         return "No Face"
 
-    def analyze_posture(self, frame):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def _window_visible(self):
+        try:
+            return cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) >= 1
+        except cv2.error:
+            return False
+
+    def analyze_posture(self, frame, rgb=None):
+        if rgb is None:
+            # Landmarks are normalized, so results from the small copy draw onto the full frame
+            small_shape = (POSTURE_INPUT_SIZE[1], POSTURE_INPUT_SIZE[0], 3)
+            small_frame = cv2.resize(frame, POSTURE_INPUT_SIZE, dst=self._reuse_buffer('_small_buf', small_shape),
+                                     interpolation=cv2.INTER_AREA)
+            rgb = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=self._reuse_buffer('_rgb_buf', small_shape))
         results = self.posture_analyzer.pose.process(rgb)
         posture = "No Person"
+        self._last_pose_results = None
         if results.pose_landmarks:
             posture, _ = self.posture_analyzer.analyze(results.pose_landmarks.landmark)
-            self.posture_analyzer.draw_landmarks(frame, results)
-        cv2.putText(frame, f"Posture: {posture}", (10, 320), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 255), 2)
+            self._last_pose_results = results
         return posture
 
+    def _draw_overlays(self, frame):
+        """Draw the latest emotion and posture detections, whichever frame produced them."""
+        if self.enable_emotion and self._last_face is not None:
+            self.emotion_detector.draw_annotations(frame, *self._last_face)
+        if self.enable_posture and self._last_posture is not None:
+            # The skeleton is only useful on screen
+            if self._last_pose_results is not None and self._window_visible():
+                self.posture_analyzer.draw_landmarks(frame, self._last_pose_results)
+            cv2.putText(frame, f"Posture: {self._last_posture}", (10, 320), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 255), 2)
+
+    @property
+    def log(self):
+        """Logged frames as a list of {'timestamp', 'emotion', 'posture'} dicts."""
+        return [
+            {'timestamp': ts, 'emotion': emotion, 'posture': posture}
+            for ts, emotion, posture in zip(self._log_ts, self._log_emotion, self._log_posture)
+        ]
+
     def log_status(self, emotion, posture):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log.append({'timestamp': timestamp, 'emotion': emotion, 'posture': posture})
+        self._log_ts.append(timestamp)
+        self._log_emotion.append(emotion)
+        self._log_posture.append(posture)
+        if emotion not in ("No Face", None):
+            self._emo_counter[emotion] += 1
+        if posture not in ("No Person", None):
+            self._post_counter[posture] += 1
 
     def summarize(self):
-        emotions = [entry['emotion'] for entry in self.log if entry['emotion'] not in ["No Face", None]]
-        postures = [entry['posture'] for entry in self.log if entry['posture'] not in ["No Person", None]]
-        emotion_counts = Counter(emotions)
-        posture_counts = Counter(postures)
+        emotion_counts = self._emo_counter
+        posture_counts = self._post_counter
         dominant_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else "Unknown"
         dominant_posture = posture_counts.most_common(1)[0][0] if posture_counts else "Unknown"
         feedback = []
@@ -78,44 +167,90 @@ class InterviewMonitor:
             feedback.append("Good posture maintained throughout the interview.")
         if dominant_emotion == "Happy":
             feedback.append("Positive attitude detected. Keep it up!")
+        raw_log = self.log
         summary_text = f"""
-Posture and Sentiment Analysis Log (timestamped):\n{self.log}\n\nDominant Emotion: {dominant_emotion}\nDominant Posture: {dominant_posture}\nFeedback: {'; '.join(feedback)}\n\nEmotion Trend: {dict(emotion_counts)}\nPosture Trend: {dict(posture_counts)}\n"""
+Posture and Sentiment Analysis Log (timestamped):\n{raw_log}\n\nDominant Emotion: {dominant_emotion}\nDominant Posture: {dominant_posture}\nFeedback: {'; '.join(feedback)}\n\nEmotion Trend: {dict(emotion_counts)}\nPosture Trend: {dict(posture_counts)}\n"""
         return {
             "dominant_emotion": dominant_emotion,
             "dominant_posture": dominant_posture,
             "feedback": feedback,
             "emotion_trend": dict(emotion_counts),
             "posture_trend": dict(posture_counts),
-            "raw_log": self.log,
+            "raw_log": raw_log,
             "summary_text": summary_text
         }
 
-    def run(self):
-        cap = cv2.VideoCapture(0)
-        cv2.namedWindow("Interview Simulation")
-        cv2.setMouseCallback("Interview Simulation", self._handle_mouse)
-        print("Click the toggle buttons or press 'q' to quit.")
+    def _capture_loop(self, cap):
+        """Read frames on a background thread, keeping only the newest one queued."""
         while self.running:
             ret, frame = cap.read()
             if not ret:
+                frame = None
+            try:
+                self._frame_q.get_nowait()
+            except queue.Empty:
+                pass
+            self._frame_q.put(frame)
+            if frame is None:
                 break
-            emotion, posture = None, None
-            if self.enable_emotion:
-                emotion = self.analyze_sentiment(frame)
-            if self.enable_posture:
-                posture = self.analyze_posture(frame)
-            for key, (pt1, pt2) in self.toggle_rects.items():
-                color = (0,255,0) if (self.enable_emotion if key=='emotion' else self.enable_posture) else (0,0,255)
-                label = f"{'ON' if (self.enable_emotion if key=='emotion' else self.enable_posture) else 'OFF'} {key.capitalize()}"
-                cv2.rectangle(frame, pt1, pt2, color, -1)
-                cv2.putText(frame, label, (pt1[0]+10, pt1[1]+30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 2)
-            cv2.imshow("Interview Simulation", frame)
+
+    def _configure_capture(self, cap):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*CAPTURE_FOURCC))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_SIZE[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_SIZE[1])
+        cap.set(cv2.CAP_PROP_FPS, CAPTURE_FPS)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        actual = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+        if actual != CAPTURE_FOURCC:
+            print(f"Camera did not accept {CAPTURE_FOURCC}, using {actual!r}")
+
+    def _show_preview(self, frame):
+        for key, (pt1, pt2) in self.toggle_rects.items():
+            color = (0,255,0) if (self.enable_emotion if key=='emotion' else self.enable_posture) else (0,0,255)
+            label = f"{'ON' if (self.enable_emotion if key=='emotion' else self.enable_posture) else 'OFF'} {key.capitalize()}"
+            cv2.rectangle(frame, pt1, pt2, color, -1)
+            cv2.putText(frame, label, (pt1[0]+10, pt1[1]+30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 2)
+        self._preview_scale = (frame.shape[1] / PREVIEW_SIZE[0], frame.shape[0] / PREVIEW_SIZE[1])
+        cv2.imshow(WINDOW_NAME, cv2.resize(frame, PREVIEW_SIZE, interpolation=cv2.INTER_AREA))
+
+    def run(self):
+        cap = cv2.VideoCapture(0)
+        self._configure_capture(cap)
+        self._capture_thread = threading.Thread(target=self._capture_loop, args=(cap,), daemon=True)
+        self._capture_thread.start()
+        if self.show_ui:
+            cv2.namedWindow(WINDOW_NAME)
+            cv2.setMouseCallback(WINDOW_NAME, self._handle_mouse)
+            print("Click the toggle buttons or press 'q' to quit.")
+        while self.running and not self._stop_event.is_set():
+            try:
+                frame = self._frame_q.get(timeout=1.0)
+            except queue.Empty:
+                if not self._capture_thread.is_alive():
+                    break
+                continue
+            if frame is None:
+                break
+            self._frame_idx += 1
+            even_frame = self._frame_idx % 2 == 0
+            if self.enable_emotion and even_frame:
+                self._last_emotion = self.analyze_sentiment(frame)
+            if self.enable_posture and not even_frame:
+                self._last_posture = self.analyze_posture(frame)
+            emotion, posture = self._last_emotion, self._last_posture
             self.log_status(emotion if self.enable_emotion else None, posture if self.enable_posture else None)
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                self.running = False
+            if self.show_ui:
+                self._draw_overlays(frame)
+                self._show_preview(frame)
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    self.running = False
+        self.running = False
+        self._capture_thread.join(timeout=1.0)
         cap.release()
-        cv2.destroyAllWindows()
+        self.posture_analyzer.close()
+        if self.show_ui:
+            cv2.destroyAllWindows()
         summary = self.summarize()
         print("Session Summary:", summary)
         return summary
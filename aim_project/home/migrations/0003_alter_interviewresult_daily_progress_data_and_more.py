@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-14 04:55
+
+import json
+
+from django.db import migrations, models
+
+JSON_FIELDS = ('daily_progress_data', 'emotion_analysis_data', 'posture_analysis_data')
+
+
+def clear_invalid_json(apps, schema_editor):
+    """Null out empty or unparseable TEXT values so the column can become JSON."""
+    InterviewResult = apps.get_model('home', 'InterviewResult')
+    for result in InterviewResult.objects.only('pk', *JSON_FIELDS).iterator():
+        cleared = {}
+        for field in JSON_FIELDS:
+            value = getattr(result, field)
+            if value is None:
+                continue
+            try:
+                json.loads(value)
+            except (TypeError, ValueError):
+                cleared[field] = None
+        if cleared:
+            InterviewResult.objects.filter(pk=result.pk).update(**cleared)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0002_interviewresult_body_language_score_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_invalid_json, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='daily_progress_data',
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='emotion_analysis_data',
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='posture_analysis_data',
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+    ]
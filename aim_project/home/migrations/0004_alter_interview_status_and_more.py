@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-14 04:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_alter_interviewresult_daily_progress_data_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interview',
+            name='status',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], db_index=True, default='scheduled', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['user', '-scheduled_date'], name='home_interv_user_id_487cfd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewquestion',
+            index=models.Index(fields=['interview', 'created_at'], name='home_interv_intervi_d94c18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewresult',
+            index=models.Index(fields=['-created_at'], name='home_interv_created_1c9502_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['user', '-uploaded_at'], name='home_jobdes_user_id_dfca22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['user', '-uploaded_at'], name='home_resume_user_id_a57dd9_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_alter_interview_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interviewquestion',
+            name='score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='body_language_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='communication_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='confidence_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='eye_contact_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='non_technical_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='overall_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='speaking_pace_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='technical_score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
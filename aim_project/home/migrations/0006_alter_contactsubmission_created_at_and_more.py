@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_alter_interviewquestion_score_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactsubmission',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='contactsubmission',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:09
+
+from django.db import migrations, models
+
+SCORE_FIELDS = ('technical_score', 'non_technical_score', 'overall_score')
+
+
+def copy_result_scores(apps, schema_editor):
+    """Fill the new Interview score columns from existing results."""
+    InterviewResult = apps.get_model('home', 'InterviewResult')
+    Interview = apps.get_model('home', 'Interview')
+    for result in InterviewResult.objects.only('interview_id', *SCORE_FIELDS).iterator():
+        Interview.objects.filter(pk=result.interview_id).update(
+            **{field: getattr(result, field) for field in SCORE_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_alter_contactsubmission_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interview',
+            name='non_technical_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interview',
+            name='overall_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interview',
+            name='technical_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_result_scores, migrations.RunPython.noop),
+    ]
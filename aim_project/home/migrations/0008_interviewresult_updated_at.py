@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_interview_denormalized_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_interviewresult_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='jobdescription',
+            new_name='jd_user_uploaded_idx',
+            old_name='home_jobdes_user_id_dfca22_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='resume',
+            new_name='resume_user_uploaded_idx',
+            old_name='home_resume_user_id_a57dd9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['user', 'status', 'scheduled_date'], name='interview_user_status_date_idx'),
+        ),
+    ]
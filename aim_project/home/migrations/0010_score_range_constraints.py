@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-14 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_named_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='interviewquestion',
+            constraint=models.CheckConstraint(condition=models.Q(('score__lte', 100)), name='question_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('technical_score__lte', 100)), name='result_technical_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('non_technical_score__lte', 100)), name='result_non_technical_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('overall_score__lte', 100)), name='result_overall_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('communication_score__lte', 100)), name='result_communication_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('confidence_score__lte', 100)), name='result_confidence_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('body_language_score__lte', 100)), name='result_body_language_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('eye_contact_score__lte', 100)), name='result_eye_contact_score_lte_100'),
+        ),
+        migrations.AddConstraint(
+            model_name='interviewresult',
+            constraint=models.CheckConstraint(condition=models.Q(('speaking_pace_score__lte', 100)), name='result_speaking_pace_score_lte_100'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
-import json
+from django.core.validators import MaxValueValidator
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -12,12 +12,12 @@ class UserProfile(models.Model):
 
 class ContactSubmission(models.Model):
     name = models.CharField(max_length=100)
-    email = models.EmailField()
+    email = models.EmailField(db_index=True)
     message = models.TextField()
-    created_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     
     def __str__(self):
-        return f"Contact from {self.name} ({self.email}) on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+        return f"Contact from {self.name} ({self.email}) on {self.created_at.isoformat(' ', 'minutes')[:16]}"
     
     class Meta:
         ordering = ['-created_at']
@@ -35,6 +35,7 @@ class JobDescription(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [models.Index(fields=['user', '-uploaded_at'], name='jd_user_uploaded_idx')]
 
 class Resume(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumes')
@@ -47,6 +48,17 @@ class Resume(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [models.Index(fields=['user', '-uploaded_at'], name='resume_user_uploaded_idx')]
+
+class InterviewQuerySet(models.QuerySet):
+    def for_report(self):
+        """Fetch JD, resume and result, and prefetch the question fields a report reads."""
+        questions = InterviewQuestion.objects.only(
+            'id', 'interview_id', 'question_text', 'answer_text', 'feedback', 'score', 'is_technical'
+        )
+        return self.select_related('job_description', 'resume', 'result').prefetch_related(
+            models.Prefetch('questions', queryset=questions)
+        )
 
 class Interview(models.Model):
     STATUS_CHOICES = (
@@ -61,76 +73,83 @@ class Interview(models.Model):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE)
     title = models.CharField(max_length=255, default="Interview")
     scheduled_date = models.DateTimeField()
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled', db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Copies of the result's scores for listing pages; kept in sync by the
+    # InterviewResult signals, None until a result exists
+    technical_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    non_technical_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    overall_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    
+    objects = InterviewQuerySet.as_manager()
     
     def __str__(self):
-        return f"Interview for {self.user.username} on {self.scheduled_date.strftime('%Y-%m-%d %H:%M')}"
+        return f"Interview for {self.user.username} on {self.scheduled_date.isoformat(' ', 'minutes')[:16]}"
     
     class Meta:
         ordering = ['-scheduled_date']
+        indexes = [
+            models.Index(fields=['user', '-scheduled_date']),
+            # Dashboard's upcoming interviews: user + status equality, date range
+            models.Index(fields=['user', 'status', 'scheduled_date'], name='interview_user_status_date_idx'),
+        ]
+
+# InterviewResult's 0-100 score columns, each held to the range by a CHECK constraint
+RESULT_SCORE_FIELDS = (
+    'technical_score', 'non_technical_score', 'overall_score', 'communication_score',
+    'confidence_score', 'body_language_score', 'eye_contact_score', 'speaking_pace_score',
+)
 
 class InterviewResult(models.Model):
     interview = models.OneToOneField(Interview, on_delete=models.CASCADE, related_name='result')
-    technical_score = models.IntegerField(default=0)  # 0-100
-    non_technical_score = models.IntegerField(default=0)  # 0-100
-    overall_score = models.IntegerField(default=0)  # 0-100
+    technical_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    non_technical_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    overall_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
     feedback = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Store daily progress data as JSON
-    daily_progress_data = models.TextField(blank=True, null=True)
+    daily_progress_data = models.JSONField(blank=True, null=True, default=dict)
     
     # Enhanced analysis data
-    emotion_analysis_data = models.TextField(blank=True, null=True)  # JSON for emotion analysis
-    posture_analysis_data = models.TextField(blank=True, null=True)  # JSON for posture analysis
-    communication_score = models.IntegerField(default=0)  # 0-100
-    confidence_score = models.IntegerField(default=0)  # 0-100
-    body_language_score = models.IntegerField(default=0)  # 0-100
-    eye_contact_score = models.IntegerField(default=0)  # 0-100
-    speaking_pace_score = models.IntegerField(default=0)  # 0-100
-    
-    def set_daily_progress(self, data):
-        """Set daily progress data as JSON"""
-        self.daily_progress_data = json.dumps(data)
-        
+    emotion_analysis_data = models.JSONField(blank=True, null=True, default=dict)  # emotion analysis
+    posture_analysis_data = models.JSONField(blank=True, null=True, default=dict)  # posture analysis
+    communication_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    confidence_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    body_language_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    eye_contact_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    speaking_pace_score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
+    
     def get_daily_progress(self):
-        """Get daily progress data from JSON"""
-        if self.daily_progress_data:
-            return json.loads(self.daily_progress_data)
-        return {}
-    
-    def set_emotion_analysis(self, data):
-        """Set emotion analysis data as JSON"""
-        self.emotion_analysis_data = json.dumps(data)
-        
+        """Get daily progress data"""
+        return self.daily_progress_data or {}
+    
     def get_emotion_analysis(self):
-        """Get emotion analysis data from JSON"""
-        if self.emotion_analysis_data:
-            return json.loads(self.emotion_analysis_data)
-        return {}
-    
-    def set_posture_analysis(self, data):
-        """Set posture analysis data as JSON"""
-        self.posture_analysis_data = json.dumps(data)
-        
+        """Get emotion analysis data"""
+        return self.emotion_analysis_data or {}
+    
     def get_posture_analysis(self):
-        """Get posture analysis data from JSON"""
-        if self.posture_analysis_data:
-            return json.loads(self.posture_analysis_data)
-        return {}
+        """Get posture analysis data"""
+        return self.posture_analysis_data or {}
     
     def __str__(self):
         return f"Result for {self.interview}"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['-created_at'])]
+        # The validators only run in forms; these hold for every write path
+        constraints = [
+            models.CheckConstraint(condition=models.Q(**{f'{field}__lte': 100}), name=f'result_{field}_lte_100')
+            for field in RESULT_SCORE_FIELDS
+        ]
 
 class InterviewQuestion(models.Model):
     interview = models.ForeignKey(Interview, on_delete=models.CASCADE, related_name='questions')
     question_text = models.TextField()
     answer_text = models.TextField(blank=True)
-    score = models.IntegerField(default=0)  # 0-100
+    score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])  # 0-100
     feedback = models.TextField(blank=True)
     is_technical = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
@@ -140,3 +159,7 @@ class InterviewQuestion(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['interview', 'created_at'])]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(score__lte=100), name='question_score_lte_100'),
+        ]
@@ -1,66 +1,345 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
 import cv2
 import numpy as np
 import mediapipe as mp
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Pose landmark indices, resolved once instead of through the enum every frame
+_POSE_LANDMARK = mp.solutions.pose.PoseLandmark
+LEFT_SHOULDER = _POSE_LANDMARK.LEFT_SHOULDER.value
+RIGHT_SHOULDER = _POSE_LANDMARK.RIGHT_SHOULDER.value
+NOSE = _POSE_LANDMARK.NOSE.value
+
+# process_frame runs pose detection on a copy whose long side is POSE_INPUT_SIZE.
+# Landmarks are normalized to the input, so keeping the aspect ratio keeps the
+# tilt/offset thresholds below meaning the same as on the full frame.
+POSE_INPUT_SIZE = 256
+
+
+def _pose_input_shape(frame_shape):
+    """(height, width, 3) of the downscaled copy of a frame, aspect ratio kept."""
+    h, w = frame_shape[:2]
+    scale = min(1.0, POSE_INPUT_SIZE / max(h, w))
+    return (max(1, round(h * scale)), max(1, round(w * scale)), 3)
+
+# process_frame submits every Nth frame for inference; frames in between reuse
+# the last posture and landmarks
+DETECT_EVERY_N = 2
+
+# Mean absolute grey-level change (0-255) below which a frame counts as still.
+# While nobody is in view, still frames are not submitted for inference.
+MOTION_THRESH = 3.0
+
+# Posture ids returned by _classify
+POSTURE_NAMES = ("Slouched", "Leaning Right", "Leaning Left", "Attentive", "Neutral")
+
+TILT_THRESH = 0.07
+OFFSET_THRESH = 0.18
+SLOUCH_Y_THRESH = 0.08
+
+# "Posture: ..." overlay drawn by process_frame
+LABEL_ORIGIN = (10, 320)
+LABEL_COLOR = (0, 200, 255)
+
+
+def _render_label(text):
+    """Rasterize one overlay label; returns (top, left, keep, premult) for compositing."""
+    (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)
+    pad = 4
+    org = (pad, h + pad)
+    size = (h + baseline + 2 * pad, w + 2 * pad)
+    layer = np.zeros(size + (3,), dtype=np.uint8)
+    coverage = np.zeros(size, dtype=np.uint8)
+    cv2.putText(layer, text, org, cv2.FONT_HERSHEY_SIMPLEX, 1, LABEL_COLOR, 2)
+    cv2.putText(coverage, text, org, cv2.FONT_HERSHEY_SIMPLEX, 1, 255, 2)
+    rows, cols = np.nonzero(coverage)
+    y0, y1, x0, x1 = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+    keep = cv2.merge([255 - coverage[y0:y1, x0:x1]] * 3)
+    # Text drawn on black is already premultiplied by its coverage
+    premult = layer[y0:y1, x0:x1].copy()
+    return LABEL_ORIGIN[1] - org[1] + y0, LABEL_ORIGIN[0] - org[0] + x0, keep, premult
+
+
+@njit(cache=True)
+def _classify(ls_x, ls_y, rs_x, rs_y, nose_x, nose_y):
+    """Return the POSTURE_NAMES index for one set of shoulder/nose coordinates."""
+    shoulder_center_x = (ls_x + rs_x) / 2
+    shoulder_width = abs(ls_x - rs_x)
+    nose_offset = (nose_x - shoulder_center_x) / (shoulder_width + 1e-6)
+    shoulder_tilt = ls_y - rs_y
+    nose_vs_shoulder = nose_y - (ls_y + rs_y) / 2
+    if nose_vs_shoulder > SLOUCH_Y_THRESH:
+        return 0
+    if nose_offset > OFFSET_THRESH or shoulder_tilt < -TILT_THRESH:
+        return 1
+    if nose_offset < -OFFSET_THRESH or shoulder_tilt > TILT_THRESH:
+        return 2
+    if abs(nose_offset) < 0.08 and abs(shoulder_tilt) < 0.04 and nose_vs_shoulder < 0.02:
+        return 3
+    return 4
+
+
 class MediaPipePostureAnalyzer:
     """
     Accurate posture analysis using MediaPipe pose landmarks (shoulders, nose).
     """
-    def __init__(self):
+    def __init__(self, model_complexity=0, static_image_mode=False):
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        # Video mode lets MediaPipe track the previous ROI instead of re-running its
+        # person detector every frame; the lite model (0) is enough for shoulder/nose
+        # posture, pass 1 or 2 for the full/heavy models
+        self.pose = self.mp_pose.Pose(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            smooth_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        self._worker = None  # started by the first process_frame call
+        # Drawing helpers built once rather than on every draw_landmarks call
+        self._mp_drawing = mp.solutions.drawing_utils
+        self._landmark_spec = self._mp_drawing.DrawingSpec(color=(0,255,0), thickness=1, circle_radius=1)
+        self._connection_spec = self._mp_drawing.DrawingSpec(color=(0,0,255), thickness=1, circle_radius=1)
+        self._frame_idx = 0
+        self._small_buf = None  # resize target, only touched on the caller thread
+        # Grey copies of the current and previous submitted-size frame for the motion gate
+        self._gray_buf = None
+        self._prev_gray = None
+        # Overlay labels rasterized once; process_frame only composites them
+        self._label_sprites = {
+            posture: _render_label(f"Posture: {posture}")
+            for posture in ("No Person",) + POSTURE_NAMES
+        }
 
     def analyze(self, landmarks):
-        idx = self.mp_pose.PoseLandmark
+        # Plain float arithmetic; landmark coordinates are already Python floats
         try:
-            left_shoulder = np.array([landmarks[idx.LEFT_SHOULDER.value].x, landmarks[idx.LEFT_SHOULDER.value].y])
-            right_shoulder = np.array([landmarks[idx.RIGHT_SHOULDER.value].x, landmarks[idx.RIGHT_SHOULDER.value].y])
-            nose = np.array([landmarks[idx.NOSE.value].x, landmarks[idx.NOSE.value].y])
+            left_shoulder = landmarks[LEFT_SHOULDER]
+            right_shoulder = landmarks[RIGHT_SHOULDER]
+            nose = landmarks[NOSE]
+            ls_x, ls_y = left_shoulder.x, left_shoulder.y
+            rs_x, rs_y = right_shoulder.x, right_shoulder.y
+            nose_x, nose_y = nose.x, nose.y
         except Exception:
             return "No Person", {}
-        shoulder_center_x = (left_shoulder[0] + right_shoulder[0]) / 2
-        shoulder_width = abs(left_shoulder[0] - right_shoulder[0])
-        nose_offset = (nose[0] - shoulder_center_x) / (shoulder_width + 1e-6)
-        shoulder_tilt = left_shoulder[1] - right_shoulder[1]
+        shoulder_center_x = (ls_x + rs_x) / 2
+        shoulder_width = abs(ls_x - rs_x)
+        nose_offset = (nose_x - shoulder_center_x) / (shoulder_width + 1e-6)
+        shoulder_tilt = ls_y - rs_y
         details = {
-            "shoulder_tilt": float(shoulder_tilt),
-            "nose_offset": float(nose_offset),
-            "shoulder_center_x": float(shoulder_center_x),
-            "nose_x": float(nose[0]),
-            "shoulder_width": float(shoulder_width)
+            "shoulder_tilt": shoulder_tilt,
+            "nose_offset": nose_offset,
+            "shoulder_center_x": shoulder_center_x,
+            "nose_x": nose_x,
+            "shoulder_width": shoulder_width
         }
-        TILT_THRESH = 0.07
-        OFFSET_THRESH = 0.18
-        SLOUCH_Y_THRESH = 0.08
-        avg_shoulder_y = (left_shoulder[1] + right_shoulder[1]) / 2
-        nose_y = nose[1]
-        nose_vs_shoulder = nose_y - avg_shoulder_y
-        if nose_vs_shoulder > SLOUCH_Y_THRESH:
-            posture = "Slouched"
-        elif nose_offset > OFFSET_THRESH or shoulder_tilt < -TILT_THRESH:
-            posture = "Leaning Right"
-        elif nose_offset < -OFFSET_THRESH or shoulder_tilt > TILT_THRESH:
-            posture = "Leaning Left"
-        elif abs(nose_offset) < 0.08 and abs(shoulder_tilt) < 0.04 and nose_vs_shoulder < 0.02:
-            posture = "Attentive"
-        else:
-            posture = "Neutral"
+        posture = POSTURE_NAMES[_classify(ls_x, ls_y, rs_x, rs_y, nose_x, nose_y)]
         return posture, details
 
     def draw_landmarks(self, frame, results):
-        mp_drawing = mp.solutions.drawing_utils
-        mp_drawing.draw_landmarks(
+        self._mp_drawing.draw_landmarks(
             frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(0,255,0), thickness=1, circle_radius=1),
-            mp_drawing.DrawingSpec(color=(0,0,255), thickness=1, circle_radius=1)
+            self._landmark_spec,
+            self._connection_spec
         )
 
     def process_frame(self, frame):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb)
-        posture = "No Person"
-        if results.pose_landmarks:
-            posture, _ = self.analyze(results.pose_landmarks.landmark)
+        """Annotate frame with the most recent pose result without waiting for inference.
+
+        The frame is handed to a background PoseWorker; the drawn landmarks may
+        lag the frame by the inference time.
+        """
+        if self._worker is None:
+            self._worker = PoseWorker(self)
+        posture, results = self._worker.latest()
+        if self._frame_idx % DETECT_EVERY_N == 0:
+            # Downscale and convert here into a buffer the worker owns until it is
+            # done with it, so annotating frame below can't race with inference
+            shape = _pose_input_shape(frame.shape)
+            if self._small_buf is None or self._small_buf.shape != shape:
+                self._small_buf = np.empty(shape, dtype=np.uint8)
+            small = cv2.resize(frame, (shape[1], shape[0]), dst=self._small_buf,
+                               interpolation=cv2.INTER_AREA)
+            if results is not None or self._scene_changed(small):
+                rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._worker.acquire_buffer(shape))
+                self._worker.submit(rgb)
+        self._frame_idx += 1
+        if results is not None:
             self.draw_landmarks(frame, results)
-        cv2.putText(frame, f"Posture: {posture}", (10, 320), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 255), 2)
+        self.draw_label(frame, posture)
         return frame
+
+    def draw_label(self, frame, posture):
+        sprite = self._label_sprites.get(posture)
+        if sprite is None:
+            sprite = self._label_sprites[posture] = _render_label(f"Posture: {posture}")
+        top, left, keep, premult = sprite
+        bottom = min(top + keep.shape[0], frame.shape[0])
+        right = min(left + keep.shape[1], frame.shape[1])
+        if bottom <= top or right <= left:
+            return
+        # Alpha-composite the premultiplied text over the frame: roi * (1 - coverage) + text
+        roi = frame[top:bottom, left:right]
+        cv2.add(cv2.multiply(roi, keep[:bottom - top, :right - left], scale=1 / 255.0),
+                premult[:bottom - top, :right - left], dst=roi)
+
+    def _scene_changed(self, small):
+        """Return True unless small is nearly identical to the last frame checked."""
+        shape = small.shape[:2]
+        if self._prev_gray is not None and self._prev_gray.shape != shape:
+            self._prev_gray = None
+        if self._gray_buf is None or self._gray_buf.shape != shape:
+            self._gray_buf = np.empty(shape, dtype=np.uint8)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+        prev = self._prev_gray
+        # Swap buffers so the next call keeps this frame as its reference
+        self._gray_buf, self._prev_gray = prev, gray
+        if prev is None:
+            return True
+        return cv2.mean(cv2.absdiff(gray, prev))[0] >= MOTION_THRESH
+
+    def close(self):
+        """Stop the inference worker and release the pose graph; safe to call twice."""
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+        if self.pose is not None:
+            self.pose.close()
+            self.pose = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# Analyzers shared by borrow_analyzer, created on demand up to one per core
+_POOL_MAX = os.cpu_count() or 1
+_pool = queue.LifoQueue()
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+@contextmanager
+def borrow_analyzer():
+    """Lend a pooled still-image analyzer to the caller for one or more frames.
+
+    Pose graphs are expensive to build and not safe to share between threads,
+    so each analyzer is used by one borrower at a time and returned afterwards.
+    Pooled analyzers run in static image mode: consecutive borrowers are
+    usually unrelated requests, so tracking from the previous image won't help.
+    """
+    global _pool_size
+    try:
+        analyzer = _pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            create = _pool_size < _POOL_MAX
+            if create:
+                _pool_size += 1
+        if create:
+            try:
+                analyzer = MediaPipePostureAnalyzer(static_image_mode=True)
+            except Exception:
+                with _pool_lock:
+                    _pool_size -= 1
+                raise
+        else:
+            analyzer = _pool.get()
+    try:
+        yield analyzer
+    finally:
+        _pool.put(analyzer)
+
+
+class PoseWorker:
+    """
+    Runs pose inference for a MediaPipePostureAnalyzer on a dedicated thread.
+    Only the newest submitted frame is kept; older pending frames are dropped.
+    """
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self._frames = queue.Queue(maxsize=1)
+        self._results = queue.Queue(maxsize=2)
+        # RGB buffers handed back by the worker (or dropped unprocessed) for reuse
+        self._free_buffers = queue.Queue()
+        self._latest = ("No Person", None)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def acquire_buffer(self, shape):
+        """Return an RGB buffer the worker is not using."""
+        try:
+            buf = self._free_buffers.get_nowait()
+        except queue.Empty:
+            return np.empty(shape, dtype=np.uint8)
+        if buf.shape != shape:
+            return np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def submit(self, rgb):
+        # Replace any frame the worker hasn't picked up yet
+        try:
+            self._free_buffers.put(self._frames.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            self._frames.put_nowait(rgb)
+        except queue.Full:
+            self._free_buffers.put(rgb)
+
+    def latest(self):
+        """Return (posture, results) for the newest processed frame."""
+        while True:
+            try:
+                self._latest = self._results.get_nowait()
+            except queue.Empty:
+                return self._latest
+
+    def close(self):
+        """Stop the thread and wait for any in-flight inference to finish."""
+        # Drop the pending frame so the None sentinel fits in the queue
+        try:
+            self._free_buffers.put(self._frames.get_nowait())
+        except queue.Empty:
+            pass
+        self._frames.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            rgb = self._frames.get()
+            if rgb is None:
+                return
+            results = self.analyzer.pose.process(rgb)
+            self._free_buffers.put(rgb)
+            posture, found = "No Person", None
+            if results.pose_landmarks:
+                posture, _ = self.analyzer.analyze(results.pose_landmarks.landmark)
+                found = results
+            if self._results.full():
+                try:
+                    self._results.get_nowait()
+                except queue.Empty:
+                    pass
+            self._results.put((posture, found))
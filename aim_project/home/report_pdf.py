@@ -0,0 +1,155 @@
+"""
+ReportLab rendering of the downloadable interview report.
+"""
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+
+# Styles are only read while building, so every report shares one set
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = _STYLES['Heading1']
+_SUBTITLE_STYLE = _STYLES['Heading2']
+_NORMAL_STYLE = _STYLES['Normal']
+_QUESTION_STYLE = _STYLES['Heading4']
+
+# Shared by the score and behavioral analysis tables
+_SCORE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+
+def _ascii(text, default):
+    """Strip non-ASCII characters from text, or return default when text is empty"""
+    if not text:
+        return default
+    # Model output is usually plain ASCII already; skip the codec round-trip then
+    if text.isascii():
+        return text
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+def build_interview_report(interview, result, out):
+    """Write the PDF report for interview and its result into the file-like out"""
+    # Create the PDF object, writing into out
+    doc = SimpleDocTemplate(out, pagesize=letter)
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Define styles
+    title_style = _TITLE_STYLE
+    subtitle_style = _SUBTITLE_STYLE
+    normal_style = _NORMAL_STYLE
+    
+    # Add title
+    elements.append(Paragraph(f"Interview Report: {interview.title}", title_style))
+    elements.append(Spacer(1, 0.25*inch))
+    
+    # Add date
+    elements.append(Paragraph(f"Date: {interview.scheduled_date.strftime('%d-%b-%Y')}", normal_style))
+    elements.append(Spacer(1, 0.25*inch))
+    
+    # Add scores
+    elements.append(Paragraph("Performance Scores", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    
+    # Create a table for scores
+    data = [
+        ["Category", "Score"],
+        ["Technical", f"{result.technical_score}%"],
+        ["Non-Technical", f"{result.non_technical_score}%"],
+        ["Overall", f"{result.overall_score}%"]
+    ]
+    
+    score_table = Table(data, colWidths=[3*inch, 1*inch])
+    score_table.setStyle(_SCORE_TABLE_STYLE)
+    
+    elements.append(score_table)
+    elements.append(Spacer(1, 0.5*inch))
+    
+    # Add behavioral analysis scores if available
+    if hasattr(result, 'confidence_score') and result.confidence_score:
+        elements.append(Paragraph("Behavioral Analysis", subtitle_style))
+        elements.append(Spacer(1, 0.1*inch))
+        
+        behavioral_data = [
+            ["Metric", "Score"],
+            ["Confidence", f"{result.confidence_score}%"],
+            ["Communication", f"{result.communication_score}%"],
+            ["Body Language", f"{result.body_language_score}%"],
+            ["Eye Contact", f"{result.eye_contact_score}%"],
+            ["Speaking Pace", f"{result.speaking_pace_score}%"]
+        ]
+        
+        behavioral_table = Table(behavioral_data, colWidths=[3*inch, 1*inch])
+        behavioral_table.setStyle(_SCORE_TABLE_STYLE)
+        
+        elements.append(behavioral_table)
+        elements.append(Spacer(1, 0.5*inch))
+        
+        # Add emotion and posture analysis if available
+        emotion_analysis = result.get_emotion_analysis()
+        posture_analysis = result.get_posture_analysis()
+        
+        if emotion_analysis or posture_analysis:
+            elements.append(Paragraph("Emotion and Posture Analysis", subtitle_style))
+            elements.append(Spacer(1, 0.1*inch))
+            
+            if emotion_analysis:
+                dominant_emotion = emotion_analysis.get('dominant_emotion', 'Unknown')
+                emotion_dist = emotion_analysis.get('emotion_distribution', {})
+                elements.append(Paragraph(f"Dominant Emotion: {dominant_emotion}", normal_style))
+                
+                if emotion_dist:
+                    emotion_text = ", ".join([f"{emotion}: {count}" for emotion, count in emotion_dist.items()])
+                    elements.append(Paragraph(f"Emotion Distribution: {emotion_text}", normal_style))
+            
+            if posture_analysis:
+                dominant_posture = posture_analysis.get('dominant_posture', 'Unknown')
+                posture_dist = posture_analysis.get('posture_distribution', {})
+                elements.append(Paragraph(f"Dominant Posture: {dominant_posture}", normal_style))
+                
+                if posture_dist:
+                    posture_text = ", ".join([f"{posture}: {count}" for posture, count in posture_dist.items()])
+                    elements.append(Paragraph(f"Posture Distribution: {posture_text}", normal_style))
+            
+            elements.append(Spacer(1, 0.5*inch))
+    
+    # Add feedback
+    elements.append(Paragraph("Feedback", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    # Clean text to prevent Unicode issues
+    clean_feedback = _ascii(result.feedback, "No feedback provided.")
+    elements.append(Paragraph(clean_feedback, normal_style))
+    elements.append(Spacer(1, 0.5*inch))
+    
+    # Add questions and answers
+    elements.append(Paragraph("Questions and Answers", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    
+    questions = interview.questions.all()
+    if questions:
+        for i, q in enumerate(questions, 1):
+            # Clean Unicode characters to prevent encoding issues
+            clean_question = _ascii(q.question_text, "Question not available")
+            clean_answer = _ascii(q.answer_text, "No answer provided")
+            clean_feedback = _ascii(q.feedback, "No feedback")
+            
+            elements.append(Paragraph(f"Q{i}: {clean_question}", _QUESTION_STYLE))
+            elements.append(Paragraph(f"Answer: {clean_answer}", normal_style))
+            elements.append(Paragraph(f"Score: {q.score}%", normal_style))
+            elements.append(Paragraph(f"Feedback: {clean_feedback}", normal_style))
+            elements.append(Spacer(1, 0.2*inch))
+    else:
+        elements.append(Paragraph("No questions recorded for this interview.", normal_style))
+    
+    # Build the PDF
+    doc.build(elements)
@@ -1,6 +1,6 @@
-from django.urls import re_path
+from django.urls import path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/interview/(?P<interview_id>\w+)/$', consumers.InterviewConsumer.as_asgi()),
-] 
\ No newline at end of file
+    path('ws/interview/<int:interview_id>/', consumers.InterviewConsumer.as_asgi()),
+]
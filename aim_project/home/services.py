@@ -0,0 +1,66 @@
+"""
+Helpers shared by several views. The per-user lookups are cached between requests.
+"""
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import JobDescription, Resume, Interview
+
+# How long the cached context may serve before it is rebuilt (seconds)
+USER_CONTEXT_TIMEOUT = 60
+
+# Most upcoming interviews the context carries
+UPCOMING_INTERVIEWS_LIMIT = 10
+
+# English month abbreviations, as %b gives them under the C locale
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+UserInterviewContext = namedtuple('UserInterviewContext', ['latest_jd', 'latest_resume', 'upcoming_interviews'])
+
+
+def _user_context_key(user_id):
+    return f'uictx:{user_id}'
+
+
+def get_user_interview_context(user):
+    """Return the user's latest JD and resume and their upcoming scheduled interviews."""
+    def load():
+        latest_jd = JobDescription.objects.filter(user=user).only(
+            'id', 'title', 'uploaded_at', 'file'
+        ).order_by('-uploaded_at').first()
+        latest_resume = Resume.objects.filter(user=user).only(
+            'id', 'title', 'uploaded_at', 'file'
+        ).order_by('-uploaded_at').first()
+        # Evaluated once here; the dashboard only shows the next few
+        upcoming_interviews = list(Interview.objects.filter(
+            user=user,
+            scheduled_date__gte=timezone.now(),
+            status='scheduled'
+        ).select_related('job_description').order_by('scheduled_date')[:UPCOMING_INTERVIEWS_LIMIT])
+        return UserInterviewContext(latest_jd, latest_resume, upcoming_interviews)
+
+    return cache.get_or_set(_user_context_key(user.id), load, timeout=USER_CONTEXT_TIMEOUT)
+
+
+def invalidate_user_interview_context(user_id):
+    """Drop the cached context after the user's JDs, resumes or interviews change."""
+    cache.delete(_user_context_key(user_id))
+
+
+def recent_day_labels(days):
+    """Return the daily progress keys ('%d-%b-%y') for the `days` days ending today."""
+    return _day_labels(timezone.now().date().toordinal(), days)
+
+
+@lru_cache(maxsize=8)
+def _day_labels(end_ordinal, days):
+    # Every request on the same day asks for the same labels
+    labels = []
+    for ordinal in range(end_ordinal - days + 1, end_ordinal + 1):
+        day = date.fromordinal(ordinal)
+        labels.append(f'{day.day:02d}-{_MONTHS[day.month - 1]}-{day.year % 100:02d}')
+    return tuple(labels)
@@ -1,7 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, Interview, InterviewResult
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -17,3 +17,21 @@ def save_user_profile(sender, instance, **kwargs):
     else:
         # Create profile if it doesn't exist
         UserProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=InterviewResult)
+def sync_interview_scores(sender, instance, **kwargs):
+    """Copy the result's scores onto its Interview for join-free listings"""
+    Interview.objects.filter(pk=instance.interview_id).update(
+        technical_score=instance.technical_score,
+        non_technical_score=instance.non_technical_score,
+        overall_score=instance.overall_score
+    )
+
+@receiver(post_delete, sender=InterviewResult)
+def clear_interview_scores(sender, instance, **kwargs):
+    """Clear the copied scores when the result is removed"""
+    Interview.objects.filter(pk=instance.interview_id).update(
+        technical_score=None,
+        non_technical_score=None,
+        overall_score=None
+    )
@@ -0,0 +1,381 @@
+"""
+Background jobs that would otherwise hold a request thread.
+
+These run on daemon threads in the web process, like the report and question
+generation threads in ai_interview_views.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from .file_cache import get_file_text
+from .models import Interview, InterviewQuestion, InterviewResult
+from .services import invalidate_user_interview_context, recent_day_labels
+
+logger = logging.getLogger('tasks')
+
+# Storage directory for rendered report PDFs
+REPORTS_DIR = 'reports'
+
+# Seconds a client should wait before asking again for a report still rendering
+REPORT_RETRY_AFTER = 5
+
+# Seconds a client should wait before polling again for generated questions
+QUESTIONS_RETRY_AFTER = 3
+
+# Seconds a client should wait before polling again for an interview's scored result
+SCORING_RETRY_AFTER = 5
+
+# Score lines in the AI report per report template version, chosen with
+# settings.REPORT_TEMPLATE_VERSION. Each is matched in one pass: lastgroup names
+# the value group of the alternative that matched, and "Non-Technical Average"
+# is consumed whole, so its "Technical Average" tail is never read as the
+# technical score.
+_SCORE_PATTERNS = {
+    'v1': (
+        r'Technical Average[^\d]*(?P<tech>\d+(?:\.\d+)?)'
+        r'|Non-Technical Average[^\d]*(?P<non_tech>\d+(?:\.\d+)?)'
+        r'|Final Score[^\d]*(?P<overall>\d+(?:\.\d+)?)'
+    ),
+}
+DEFAULT_REPORT_TEMPLATE_VERSION = 'v1'
+
+# InterviewResult columns score_interview's upsert overwrites on an existing result
+RESULT_UPSERT_FIELDS = (
+    'technical_score', 'non_technical_score', 'overall_score',
+    'feedback', 'daily_progress_data', 'updated_at',
+)
+
+# Interviews with a PDF render, question generation or scoring run in flight
+_pending_reports = set()
+_pending_questions = set()
+_pending_scoring = set()
+_pending_lock = threading.Lock()
+
+# Last question generation or scoring error per interview, reported on the next poll
+_question_errors = {}
+_scoring_errors = {}
+
+
+def report_pdf_path(interview, result):
+    """Storage path of the PDF for the current contents of the report.
+
+    The name carries a digest of everything the PDF shows, so a regenerated
+    result or rescored question gets a new file instead of a stale one.
+    """
+    digest = hashlib.sha1()
+    fields = [
+        interview.title, interview.scheduled_date,
+        result.pk, result.technical_score, result.non_technical_score, result.overall_score,
+        result.confidence_score, result.communication_score, result.body_language_score,
+        result.eye_contact_score, result.speaking_pace_score, result.feedback,
+        json.dumps(result.get_emotion_analysis(), sort_keys=True, default=str),
+        json.dumps(result.get_posture_analysis(), sort_keys=True, default=str),
+    ]
+    for q in interview.questions.all():
+        fields += [q.pk, q.question_text, q.answer_text, q.score, q.feedback]
+    for value in fields:
+        digest.update(str(value).encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+    return f'{REPORTS_DIR}/{interview.pk}_{digest.hexdigest()[:16]}.pdf'
+
+
+def render_interview_pdf(interview_id):
+    """Render and store the report PDF for an interview; returns its storage path"""
+    from .report_pdf import build_interview_report
+
+    interview = Interview.objects.for_report().get(pk=interview_id)
+    result = getattr(interview, 'result', None)
+    if result is None:
+        return None
+    path = report_pdf_path(interview, result)
+    if default_storage.exists(path):
+        return path
+    
+    try:
+        final_path = default_storage.path(path)
+    except NotImplementedError:
+        final_path = None
+    if final_path is None:
+        # Remote storage: the object only becomes visible once the upload completes
+        buffer = io.BytesIO()
+        build_interview_report(interview, result, buffer)
+        # Let storage copy the buffer out in chunks rather than duplicating it with getvalue()
+        buffer.seek(0)
+        path = default_storage.save(path, File(buffer, name=path))
+    else:
+        # Render next to the final file and rename it into place, so download_report
+        # never sees (and serves) a half-written PDF
+        report_dir = os.path.dirname(final_path)
+        os.makedirs(report_dir, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=report_dir, prefix='.', suffix='.pdf.tmp', delete=False)
+        try:
+            with tmp:
+                build_interview_report(interview, result, tmp)
+            os.replace(tmp.name, final_path)
+        except BaseException:
+            try:
+                os.remove(tmp.name)
+            except OSError:
+                pass
+            raise
+    _delete_old_reports(interview_id, keep=path)
+    return path
+
+
+def _delete_old_reports(interview_id, keep):
+    """Remove PDFs rendered for earlier versions of this interview's report"""
+    prefix = f'{interview_id}_'
+    try:
+        _, files = default_storage.listdir(REPORTS_DIR)
+    except (OSError, NotImplementedError):
+        return
+    for name in files:
+        path = f'{REPORTS_DIR}/{name}'
+        if name.startswith(prefix) and path != keep:
+            try:
+                default_storage.delete(path)
+            except OSError as e:
+                logger.warning(f"Could not delete old report {path}: {e}")
+
+
+def render_interview_pdf_async(interview_id):
+    """Start rendering an interview's PDF on a background thread, unless one is already running"""
+    with _pending_lock:
+        if interview_id in _pending_reports:
+            return
+        _pending_reports.add(interview_id)
+
+    def render_thread():
+        try:
+            render_interview_pdf(interview_id)
+        except Exception as e:
+            logger.error(f"Error rendering PDF report for interview {interview_id}: {e}")
+        finally:
+            with _pending_lock:
+                _pending_reports.discard(interview_id)
+            connection.close()
+
+    threading.Thread(target=render_thread, daemon=True).start()
+
+
+def _load_interviewer(interview):
+    """Return an AIInterviewer primed with the interview's job description and CV"""
+    from .ai_interviewer import AIInterviewer
+
+    ai_interviewer = AIInterviewer()
+    
+    # Load job description and CV
+    jd_path = interview.job_description.file.path
+    cv_path = interview.resume.file.path
+    
+    # Load files directly if they exist on disk
+    if os.path.exists(jd_path) and os.path.exists(cv_path):
+        ai_interviewer.job_description = get_file_text(jd_path, ai_interviewer)
+        ai_interviewer.cv = get_file_text(cv_path, ai_interviewer)
+    else:
+        # Otherwise load from Django file objects
+        ai_interviewer.load_job_description_from_django_file(interview.job_description.file)
+        ai_interviewer.load_cv_from_django_file(interview.resume.file)
+    return ai_interviewer
+
+
+def generate_questions(interview_id):
+    """Generate the AI questions for an interview and store them in one INSERT"""
+    interview = Interview.objects.select_related('job_description', 'resume').get(pk=interview_id)
+    ai_interviewer = _load_interviewer(interview)
+    
+    # Generate questions
+    questions = ai_interviewer.generate_questions()
+    
+    # Save questions to database
+    InterviewQuestion.objects.bulk_create([
+        InterviewQuestion(
+            interview=interview,
+            question_text=q['question'],
+            is_technical=(q['type'] == 'technical')
+        )
+        for q in questions
+    ], batch_size=50)
+    return questions
+
+
+def generate_questions_async(interview_id):
+    """Start generating an interview's questions on a background thread, unless already running"""
+    with _pending_lock:
+        if interview_id in _pending_questions:
+            return
+        _pending_questions.add(interview_id)
+
+    def generate_thread():
+        try:
+            generate_questions(interview_id)
+        except Exception as e:
+            logger.error(f"Error generating questions for interview {interview_id}: {e}")
+            _question_errors[interview_id] = str(e)
+        finally:
+            with _pending_lock:
+                _pending_questions.discard(interview_id)
+            connection.close()
+
+    threading.Thread(target=generate_thread, daemon=True).start()
+
+
+def pop_question_generation_error(interview_id):
+    """Return and clear the error from the last failed generation, if any"""
+    return _question_errors.pop(interview_id, None)
+
+
+@lru_cache(maxsize=16)
+def _scores_re(version):
+    """Compiled score pattern for a report template version, kept for the life of the process"""
+    try:
+        return re.compile(_SCORE_PATTERNS[version])
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown REPORT_TEMPLATE_VERSION {version!r}") from None
+
+
+def parse_report_scores(report):
+    """Return the (technical, non-technical, overall) scores in an AI report, 0 when missing.
+
+    The two averages are reported out of 10 and scaled to 0-100 here. All three
+    are capped at 100, since the LLM can write "12/10" and the columns are 0-100.
+    """
+    technical_score = 0
+    non_technical_score = 0
+    overall_score = 0
+    
+    # Try to extract scores using regex; the first match of each score wins and
+    # the scan stops once all three are in. Empty LLM output is not scanned.
+    found = {}
+    scores_re = _scores_re(getattr(settings, 'REPORT_TEMPLATE_VERSION', DEFAULT_REPORT_TEMPLATE_VERSION))
+    for match in (scores_re.finditer(report) if report else ()):
+        found.setdefault(match.lastgroup, match.group(match.lastgroup))
+        if len(found) == 3:
+            break
+    
+    if 'tech' in found:
+        technical_score = float(found['tech']) * 10  # Convert from 0-10 to 0-100
+    if 'non_tech' in found:
+        non_technical_score = float(found['non_tech']) * 10  # Convert from 0-10 to 0-100
+    if 'overall' in found:
+        overall_score = float(found['overall'])
+    return min(technical_score, 100), min(non_technical_score, 100), min(overall_score, 100)
+
+
+def score_interview(interview_id):
+    """Generate the AI report for an interview and store its scored result"""
+    import numpy as np
+
+    interview = Interview.objects.select_related('job_description', 'resume').get(pk=interview_id)
+    ai_interviewer = _load_interviewer(interview)
+    
+    # Prepare interview data for report generation
+    questions = InterviewQuestion.objects.filter(interview_id=interview.id).values(
+        'id', 'question_text', 'answer_text', 'is_technical'
+    )
+    interview_data = ({
+        'question_number': q['id'],
+        'question_data': {
+            'id': q['id'],
+            'type': 'technical' if q['is_technical'] else 'non-technical',
+            'question': q['question_text']
+        },
+        'answer': q['answer_text'] or "No answer provided."
+    } for q in questions)
+    
+    # Generate report
+    report = ai_interviewer.generate_report(interview_data)
+    
+    # Extract scores from the report
+    technical_score, non_technical_score, overall_score = parse_report_scores(report)
+    
+    # Generate daily progress data (last 7 days), a progression that starts
+    # low and ends at the overall score
+    base_scores = 30 + (overall_score - 30) * np.linspace(0, 1, 7)
+    variation = np.random.default_rng().integers(-5, 5, size=7, endpoint=True)
+    scores = np.clip(base_scores + variation, 0, 100)
+    dates = recent_day_labels(7)
+    
+    # Insert the result, or overwrite the interview's existing one, in one
+    # upsert. bulk_create sends no post_save, so the denormalized scores
+    # sync_interview_scores would copy go out with the status update below.
+    result = InterviewResult(
+        interview=interview,
+        technical_score=technical_score,
+        non_technical_score=non_technical_score,
+        overall_score=overall_score,
+        feedback=report,
+        daily_progress_data=dict(zip(dates, scores.tolist())),
+    )
+    InterviewResult.objects.bulk_create(
+        [result],
+        update_conflicts=True,
+        unique_fields=['interview'],
+        update_fields=RESULT_UPSERT_FIELDS,
+    )
+    
+    mark_interview_completed(interview, result.technical_score, result.non_technical_score, result.overall_score)
+    return result
+
+
+def mark_interview_completed(interview, technical_score, non_technical_score, overall_score):
+    """Set the interview completed and copy its result's scores onto it in one UPDATE.
+
+    For result writes that skip post_save (update(), bulk_create upserts), which
+    leaves sync_interview_scores unrun. A full interview.save() would write the
+    instance's stale scores instead. The owner's cached dashboard context is
+    dropped so the interview stops showing as upcoming.
+    """
+    Interview.objects.filter(pk=interview.pk).update(
+        status='completed',
+        technical_score=technical_score,
+        non_technical_score=non_technical_score,
+        overall_score=overall_score,
+    )
+    invalidate_user_interview_context(interview.user_id)
+
+
+def score_interview_async(interview_id):
+    """Start scoring an interview on a background thread, unless a run is already going"""
+    with _pending_lock:
+        if interview_id in _pending_scoring:
+            return
+        _pending_scoring.add(interview_id)
+        _scoring_errors.pop(interview_id, None)
+
+    def score_thread():
+        try:
+            score_interview(interview_id)
+        except Exception as e:
+            logger.error(f"Error scoring interview {interview_id}: {e}")
+            _scoring_errors[interview_id] = str(e)
+        finally:
+            with _pending_lock:
+                _pending_scoring.discard(interview_id)
+            connection.close()
+
+    threading.Thread(target=score_thread, daemon=True).start()
+
+
+def is_scoring_pending(interview_id):
+    """Whether a score_interview run for the interview is in flight"""
+    with _pending_lock:
+        return interview_id in _pending_scoring
+
+
+def pop_scoring_error(interview_id):
+    """Return and clear the error from the last failed scoring run, if any"""
+    return _scoring_errors.pop(interview_id, None)
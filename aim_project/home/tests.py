@@ -1,3 +1,153 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Interview, InterviewQuestion, InterviewResult, JobDescription, Resume
+from .tasks import parse_report_scores, score_interview
+
+
+class CountingHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher that counts how many hashes it computes."""
+    algorithm = 'counting_pbkdf2'
+    iterations = 1
+    calls = 0
+
+    def encode(self, password, salt, iterations=None):
+        CountingHasher.calls += 1
+        return super().encode(password, salt, iterations)
+
+
+def make_interview(user, **kwargs):
+    jd = JobDescription.objects.create(user=user, title="Backend Engineer", file='job_descriptions/jd.txt')
+    cv = Resume.objects.create(user=user, title="CV", file='resumes/cv.txt')
+    kwargs.setdefault('scheduled_date', timezone.now() + timedelta(days=1))
+    return Interview.objects.create(user=user, job_description=jd, resume=cv, **kwargs)
+
+
+class ParseReportScoresTests(TestCase):
+    def test_scales_averages_and_reads_final_score(self):
+        report = "Technical Average: 7.5/10\nNon-Technical Average: 6/10\nFinal Score: 68/100"
+        self.assertEqual(parse_report_scores(report), (75.0, 60.0, 68.0))
+
+    def test_non_technical_average_is_not_read_as_technical(self):
+        # "Technical Average" is a substring of "Non-Technical Average"
+        report = "Non-Technical Average: 4/10\nTechnical Average: 9/10\nFinal Score: 65"
+        self.assertEqual(parse_report_scores(report), (90.0, 40.0, 65.0))
+
+    def test_first_match_of_each_score_wins(self):
+        report = "Technical Average: 8\nTechnical Average: 2\nFinal Score: 70\nFinal Score: 10"
+        technical, _, overall = parse_report_scores(report)
+        self.assertEqual((technical, overall), (80.0, 70.0))
+
+    def test_missing_scores_are_zero(self):
+        self.assertEqual(parse_report_scores("Technical Average: 5"), (50.0, 0, 0))
+        self.assertEqual(parse_report_scores(""), (0, 0, 0))
+        self.assertEqual(parse_report_scores(None), (0, 0, 0))
+
+    def test_scores_are_capped_at_100(self):
+        report = "Technical Average: 12/10\nNon-Technical Average: 10.5/10\nFinal Score: 130"
+        self.assertEqual(parse_report_scores(report), (100, 100, 100))
+
+
+class ScoreInterviewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidate', password='pw')
+        self.interview = make_interview(self.user)
+        InterviewQuestion.objects.create(interview=self.interview, question_text="Q1", answer_text="A1")
+        InterviewQuestion.objects.create(interview=self.interview, question_text="Q2", is_technical=False)
+
+    def score(self, report):
+        interviewer = mock.Mock()
+        interviewer.generate_report.return_value = report
+        with mock.patch('home.tasks._load_interviewer', return_value=interviewer):
+            score_interview(self.interview.id)
+        return interviewer
+
+    def test_creates_result_and_syncs_interview_scores(self):
+        interviewer = self.score("Technical Average: 8/10\nNon-Technical Average: 6/10\nFinal Score: 72")
+
+        answers = [item['answer'] for item in interviewer.generate_report.call_args.args[0]]
+        self.assertEqual(answers, ["A1", "No answer provided."])
+        result = InterviewResult.objects.get(interview=self.interview)
+        self.assertEqual((result.technical_score, result.non_technical_score, result.overall_score), (80, 60, 72))
+        self.assertEqual(len(result.daily_progress_data), 7)
+        self.interview.refresh_from_db()
+        self.assertEqual(self.interview.status, 'completed')
+        self.assertEqual(
+            (self.interview.technical_score, self.interview.non_technical_score, self.interview.overall_score),
+            (80, 60, 72),
+        )
+
+    def test_rescoring_overwrites_the_existing_result(self):
+        self.score("Technical Average: 3/10\nNon-Technical Average: 3/10\nFinal Score: 30")
+        first = InterviewResult.objects.get(interview=self.interview)
+
+        self.score("Technical Average: 9/10\nNon-Technical Average: 7/10\nFinal Score: 85")
+
+        result = InterviewResult.objects.get(interview=self.interview)
+        self.assertEqual(result.pk, first.pk)
+        self.assertEqual((result.technical_score, result.non_technical_score, result.overall_score), (90, 70, 85))
+        self.assertIn("Final Score: 85", result.feedback)
+        self.interview.refresh_from_db()
+        self.assertEqual(
+            (self.interview.technical_score, self.interview.non_technical_score, self.interview.overall_score),
+            (90, 70, 85),
+        )
+
+    def test_out_of_range_scores_are_stored_capped(self):
+        self.score("Technical Average: 15/10\nNon-Technical Average: 5/10\nFinal Score: 140")
+
+        self.interview.refresh_from_db()
+        self.assertEqual((self.interview.technical_score, self.interview.overall_score), (100, 100))
+
+
+class InterviewViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidate', password='pw')
+        self.client.force_login(self.user)
+        self.interview = make_interview(self.user)
+
+    def test_ai_interview_dispatch_unknown_action_is_404(self):
+        url = reverse('ai_interview_action', args=['explode', self.interview.id])
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+    def test_interview_complete_rejects_malformed_id(self):
+        for interview_id in ('abc', ''):
+            response = self.client.post(
+                reverse('interview_complete'), {'interview_id': interview_id},
+                headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['message'], 'Invalid interview id')
+        self.interview.refresh_from_db()
+        self.assertEqual(self.interview.status, 'scheduled')
+
+    def test_interview_complete_missing_id_is_400(self):
+        response = self.client.post(reverse('interview_complete'), headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=['home.tests.CountingHasher'])
+class AuthenticationBackendTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('candidate', password='correct-horse')
+        CountingHasher.calls = 0
+
+    def test_wrong_password_hashes_once(self):
+        self.assertIsNone(authenticate(username='candidate', password='wrong'))
+        self.assertEqual(CountingHasher.calls, 1)
+
+    def test_unknown_username_hashes_once(self):
+        self.assertIsNone(authenticate(username='nobody', password='wrong'))
+        self.assertEqual(CountingHasher.calls, 1)
+
+    def test_valid_login_uses_the_profile_backend(self):
+        user = authenticate(username='candidate', password='correct-horse')
+        self.assertIsNotNone(user)
+        self.assertEqual(user.backend, 'home.backends.ProfileModelBackend')
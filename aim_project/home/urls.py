@@ -14,6 +14,7 @@ urlpatterns = [
     path('upload-resume/', views.upload_resume, name='upload_resume'),
     path('schedule-interview/', views.schedule_interview, name='schedule_interview'),
     path('interview/<int:interview_id>/', views.interview_detail, name='interview_detail'),
+    path('interview/<int:interview_id>/result/', views.interview_result, name='interview_result'),
     path('reports/', views.reports, name='reports'),
     path('settings/', views.settings, name='settings'),
     path('faqs/', views.faqs, name='faqs'),
@@ -30,10 +31,8 @@ urlpatterns = [
     path('interview-complete/', views.interview_complete, name='interview_complete'),
     
     # AI Interviewer API endpoints
-    path('api/ai-interview/start/<int:interview_id>/', ai_interview_views.ai_interview_start, name='ai_interview_start'),
-    path('api/ai-interview/questions/<int:interview_id>/', ai_interview_views.ai_interview_questions, name='ai_interview_questions'),
+    # start / questions / complete / status, see ai_interview_views.AI_INTERVIEW_ACTIONS
+    path('api/ai-interview/<str:action>/<int:interview_id>/', ai_interview_views.ai_interview_dispatch, name='ai_interview_action'),
     path('api/ai-interview/answer/<int:interview_id>/<int:question_id>/', ai_interview_views.ai_interview_answer, name='ai_interview_answer'),
-    path('api/ai-interview/complete/<int:interview_id>/', ai_interview_views.ai_interview_complete, name='ai_interview_complete'),
-    path('api/ai-interview/status/<int:interview_id>/', ai_interview_views.ai_interview_status, name='ai_interview_status'),
     path('api/analyze-snapshot/', ai_interview_views.analyze_snapshot, name='analyze_snapshot'),
 ]
@@ -4,33 +4,69 @@ from django.contrib.auth import login, authenticate, logout, update_session_auth
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpResponse, FileResponse
 from django.utils import timezone
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.core.files.storage import default_storage
 from django.template.loader import render_to_string
+from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.vary import vary_on_cookie
 import json
-import os
-import io
 import random
-from datetime import timedelta
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-import numpy as np
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+
+# orjson parses and serializes the JSON API payloads several times faster than
+# the stdlib; fall back to the json module when it isn't installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from .forms import (
     ContactForm, LoginForm, SignUpForm, 
     JobDescriptionForm, ResumeForm, InterviewScheduleForm,
     ProfilePictureForm, UsernameChangeForm, CustomPasswordChangeForm
 )
 from .models import JobDescription, Resume, Interview, InterviewResult, InterviewQuestion, UserProfile
-from .ai_interviewer import AIInterviewer
+from .services import get_user_interview_context, invalidate_user_interview_context, recent_day_labels
+from .tasks import (
+    REPORT_RETRY_AFTER, report_pdf_path, render_interview_pdf_async,
+    QUESTIONS_RETRY_AFTER, generate_questions_async, pop_question_generation_error,
+    SCORING_RETRY_AFTER, score_interview_async, is_scoring_pending, pop_scoring_error
+)
+
+# Seconds an assembled get_report_data payload stays cached; the key carries
+# the result's updated_at, so a changed result never serves a stale payload
+REPORT_DATA_TIMEOUT = 3600
+
+# InterviewResult columns read by _build_report_data
+REPORT_DATA_FIELDS = (
+    'id', 'technical_score', 'non_technical_score', 'overall_score',
+    'confidence_score', 'communication_score', 'body_language_score',
+    'eye_contact_score', 'speaking_pace_score',
+    'daily_progress_data', 'emotion_analysis_data', 'posture_analysis_data',
+)
+
+def _json_loads(body):
+    """Parse a JSON request body; raises json.JSONDecodeError on bad input"""
+    if ORJSON_AVAILABLE:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(body)
+    return json.loads(body)
+
+def _json_dumps(payload):
+    """Serialize payload to JSON bytes, with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+
+def _json_response(payload, status=200):
+    """JsonResponse equivalent that serializes with orjson when available"""
+    return HttpResponse(_json_dumps(payload), content_type='application/json', status=status)
 
 def home(request):
     return render(request, 'home/index.html')
@@ -86,7 +122,8 @@ def signup_view(request):
         form = SignUpForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            # Several backends are configured, so name the one to store in the session
+            login(request, user, backend='home.backends.ProfileModelBackend')
             messages.success(request, f'Account created successfully! Welcome, {user.username}!')
             return redirect('dashboard')
     else:
@@ -101,20 +138,12 @@ def logout_view(request):
 
 @login_required
 def dashboard(request):
-    # Get the latest job description and resume for the user
-    latest_jd = JobDescription.objects.filter(user=request.user).order_by('-uploaded_at').first()
-    latest_resume = Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
+    # Get the latest job description and resume and upcoming interviews for the user
+    latest_jd, latest_resume, upcoming_interviews = get_user_interview_context(request.user)
     
     # Check if both JD and resume are uploaded
     can_start_interview = latest_jd is not None and latest_resume is not None
     
-    # Get upcoming interviews
-    upcoming_interviews = Interview.objects.filter(
-        user=request.user,
-        scheduled_date__gte=timezone.now(),
-        status='scheduled'
-    ).order_by('scheduled_date')
-    
     context = {
         'latest_jd': latest_jd,
         'latest_resume': latest_resume,
@@ -133,6 +162,7 @@ def upload_job_description(request):
             job_description = form.save(commit=False)
             job_description.user = request.user
             job_description.save()
+            invalidate_user_interview_context(request.user.id)
             
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -157,6 +187,7 @@ def upload_resume(request):
             resume = form.save(commit=False)
             resume.user = request.user
             resume.save()
+            invalidate_user_interview_context(request.user.id)
             
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -176,8 +207,7 @@ def upload_resume(request):
 @login_required
 def schedule_interview(request):
     # Get the latest job description and resume
-    latest_jd = JobDescription.objects.filter(user=request.user).order_by('-uploaded_at').first()
-    latest_resume = Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
+    latest_jd, latest_resume, _ = get_user_interview_context(request.user)
     
     if not latest_jd or not latest_resume:
         messages.error(request, 'Please upload both a job description and a resume before scheduling an interview.')
@@ -192,6 +222,7 @@ def schedule_interview(request):
             interview.resume = latest_resume
             interview.title = latest_jd.title  # Use job title as interview title
             interview.save()
+            invalidate_user_interview_context(request.user.id)
             
             messages.success(request, 'Interview scheduled successfully!')
             return redirect('interview_detail', interview_id=interview.id)
@@ -213,32 +244,22 @@ def interview_detail(request, interview_id):
 
 @login_required
 def reports(request):
-    # Get completed interviews
-    completed_interviews = Interview.objects.filter(
+    # Get completed interviews; the scores shown per row are stored on the
+    # interview itself, so the listing needs no join
+    completed_interviews = list(Interview.objects.filter(
         user=request.user,
         status='completed'
-    ).order_by('-scheduled_date')
-    
-    # Check if there are any completed interviews with results
-    has_interview_data = False
-    latest_result = None
-    
-    try:
-        # Try to check for interview results
-        has_interview_data = InterviewResult.objects.filter(
-            interview__user=request.user
-        ).exists()
-        
-        # Get the most recent interview result for charts
-        if has_interview_data:
-            latest_result = InterviewResult.objects.filter(
-                interview__user=request.user
-            ).order_by('-created_at').first()
-    except:
-        # If the table doesn't exist yet or any other error occurs,
-        # assume there's no interview data
-        has_interview_data = False
-        latest_result = None
+    ).only(
+        'id', 'title', 'scheduled_date', 'status',
+        'technical_score', 'non_technical_score', 'overall_score'
+    ).order_by('-scheduled_date'))
+    
+    # Get the most recent interview result for charts
+    latest_result = InterviewResult.objects.filter(
+        interview__user=request.user,
+        interview__status='completed'
+    ).only('id').order_by('-created_at').first()
+    has_interview_data = latest_result is not None
     
     context = {
         'completed_interviews': completed_interviews,
@@ -252,8 +273,21 @@ def reports(request):
 @login_required
 def get_report_data(request, result_id):
     """API endpoint to get report data for charts"""
-    result = get_object_or_404(InterviewResult, id=result_id, interview__user=request.user)
-    
+    # Only the version is needed to look up the cached payload
+    result = get_object_or_404(
+        InterviewResult.objects.only('id', 'updated_at'), id=result_id, interview__user=request.user
+    )
+    cache_key = f'rpt:{result.id}:{result.updated_at.timestamp()}'
+    payload = cache.get(cache_key)
+    if payload is None:
+        # Skip feedback, which the charts never read
+        result = InterviewResult.objects.only(*REPORT_DATA_FIELDS).get(pk=result.pk)
+        payload = _json_dumps(_build_report_data(result))
+        cache.set(cache_key, payload, REPORT_DATA_TIMEOUT)
+    return HttpResponse(payload, content_type='application/json')
+
+def _build_report_data(result):
+    """Assemble the chart data returned by get_report_data"""
     # Get daily progress data
     daily_progress = result.get_daily_progress()
     
@@ -276,7 +310,7 @@ def get_report_data(request, result_id):
     emotion_analysis = result.get_emotion_analysis()
     posture_analysis = result.get_posture_analysis()
     
-    return JsonResponse({
+    return {
         'daily_progress': daily_progress,
         'pie_data': pie_data,
         'technical_score': result.technical_score,
@@ -285,169 +319,41 @@ def get_report_data(request, result_id):
         'behavioral_data': behavioral_data,
         'emotion_analysis': emotion_analysis,
         'posture_analysis': posture_analysis
-    })
+    }
+
+def _get_interview_with_report(interview_id, user):
+    """Load an interview with its result, JD, resume and report questions in two queries"""
+    return get_object_or_404(Interview.objects.for_report(), id=interview_id, user=user)
 
 @login_required
 def download_report(request, interview_id):
-    """Generate and download a PDF report for an interview"""
-    interview = get_object_or_404(Interview, id=interview_id, user=request.user)
+    """Download the PDF report for an interview, rendering it in the background if needed"""
+    interview = _get_interview_with_report(interview_id, request.user)
     
-    try:
-        result = interview.result
-    except InterviewResult.DoesNotExist:
+    result = getattr(interview, 'result', None)
+    if result is None:
         messages.error(request, "No results found for this interview.")
         return redirect('reports')
     
-    # Create a file-like buffer to receive PDF data
-    buffer = io.BytesIO()
-    
-    # Create the PDF object, using the buffer as its "file"
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Heading1']
-    subtitle_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Add title
-    elements.append(Paragraph(f"Interview Report: {interview.title}", title_style))
-    elements.append(Spacer(1, 0.25*inch))
-    
-    # Add date
-    elements.append(Paragraph(f"Date: {interview.scheduled_date.strftime('%d-%b-%Y')}", normal_style))
-    elements.append(Spacer(1, 0.25*inch))
-    
-    # Add scores
-    elements.append(Paragraph("Performance Scores", subtitle_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Create a table for scores
-    data = [
-        ["Category", "Score"],
-        ["Technical", f"{result.technical_score}%"],
-        ["Non-Technical", f"{result.non_technical_score}%"],
-        ["Overall", f"{result.overall_score}%"]
-    ]
-    
-    score_table = Table(data, colWidths=[3*inch, 1*inch])
-    score_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(score_table)
-    elements.append(Spacer(1, 0.5*inch))
-    
-    # Add behavioral analysis scores if available
-    if hasattr(result, 'confidence_score') and result.confidence_score:
-        elements.append(Paragraph("Behavioral Analysis", subtitle_style))
-        elements.append(Spacer(1, 0.1*inch))
-        
-        behavioral_data = [
-            ["Metric", "Score"],
-            ["Confidence", f"{result.confidence_score}%"],
-            ["Communication", f"{result.communication_score}%"],
-            ["Body Language", f"{result.body_language_score}%"],
-            ["Eye Contact", f"{result.eye_contact_score}%"],
-            ["Speaking Pace", f"{result.speaking_pace_score}%"]
-        ]
-        
-        behavioral_table = Table(behavioral_data, colWidths=[3*inch, 1*inch])
-        behavioral_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(behavioral_table)
-        elements.append(Spacer(1, 0.5*inch))
-        
-        # Add emotion and posture analysis if available
-        emotion_analysis = result.get_emotion_analysis()
-        posture_analysis = result.get_posture_analysis()
-        
-        if emotion_analysis or posture_analysis:
-            elements.append(Paragraph("Emotion and Posture Analysis", subtitle_style))
-            elements.append(Spacer(1, 0.1*inch))
-            
-            if emotion_analysis:
-                dominant_emotion = emotion_analysis.get('dominant_emotion', 'Unknown')
-                emotion_dist = emotion_analysis.get('emotion_distribution', {})
-                elements.append(Paragraph(f"Dominant Emotion: {dominant_emotion}", normal_style))
-                
-                if emotion_dist:
-                    emotion_text = ", ".join([f"{emotion}: {count}" for emotion, count in emotion_dist.items()])
-                    elements.append(Paragraph(f"Emotion Distribution: {emotion_text}", normal_style))
-            
-            if posture_analysis:
-                dominant_posture = posture_analysis.get('dominant_posture', 'Unknown')
-                posture_dist = posture_analysis.get('posture_distribution', {})
-                elements.append(Paragraph(f"Dominant Posture: {dominant_posture}", normal_style))
-                
-                if posture_dist:
-                    posture_text = ", ".join([f"{posture}: {count}" for posture, count in posture_dist.items()])
-                    elements.append(Paragraph(f"Posture Distribution: {posture_text}", normal_style))
-            
-            elements.append(Spacer(1, 0.5*inch))
-    
-    # Add feedback
-    elements.append(Paragraph("Feedback", subtitle_style))
-    elements.append(Spacer(1, 0.1*inch))
-    # Fix Unicode handling for feedback text
-    feedback_text = result.feedback if result.feedback else "No feedback provided."
-    # Clean text to prevent Unicode issues
-    clean_feedback = feedback_text.encode('ascii', 'ignore').decode('ascii') if feedback_text else "No feedback provided."
-    elements.append(Paragraph(clean_feedback, normal_style))
-    elements.append(Spacer(1, 0.5*inch))
-    
-    # Add questions and answers
-    elements.append(Paragraph("Questions and Answers", subtitle_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    questions = interview.questions.all()
-    if questions:
-        for i, q in enumerate(questions, 1):
-            # Clean Unicode characters to prevent encoding issues
-            clean_question = q.question_text.encode('ascii', 'ignore').decode('ascii') if q.question_text else "Question not available"
-            clean_answer = q.answer_text.encode('ascii', 'ignore').decode('ascii') if q.answer_text else "No answer provided"
-            clean_feedback = q.feedback.encode('ascii', 'ignore').decode('ascii') if q.feedback else "No feedback"
-            
-            elements.append(Paragraph(f"Q{i}: {clean_question}", styles['Heading4']))
-            elements.append(Paragraph(f"Answer: {clean_answer}", normal_style))
-            elements.append(Paragraph(f"Score: {q.score}%", normal_style))
-            elements.append(Paragraph(f"Feedback: {clean_feedback}", normal_style))
-            elements.append(Spacer(1, 0.2*inch))
-    else:
-        elements.append(Paragraph("No questions recorded for this interview.", normal_style))
-    
-    # Build the PDF
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer
-    pdf = buffer.getvalue()
-    buffer.close()
-    
-    # Create the HTTP response with PDF
-    response = HttpResponse(pdf, content_type='application/pdf')
-    # Fix Unicode encoding issue by using ASCII-safe filename
-    safe_filename = f'interview_report_{interview_id}.pdf'
-    response['Content-Disposition'] = f'attachment; filename="{safe_filename}"'
-    
+    path = report_pdf_path(interview, result)
+    if default_storage.exists(path):
+        # Fix Unicode encoding issue by using ASCII-safe filename
+        safe_filename = f'interview_report_{interview_id}.pdf'
+        return FileResponse(default_storage.open(path, 'rb'), as_attachment=True,
+                            filename=safe_filename, content_type='application/pdf')
+    
+    # Not rendered yet (or the result changed since): build it off the request thread
+    render_interview_pdf_async(interview_id)
+    response = JsonResponse({
+        'status': 'pending',
+        'message': 'Your report is being generated. Please try again in a few seconds.'
+    }, status=202)
+    response['Retry-After'] = str(REPORT_RETRY_AFTER)
+    # Browsers following the download link reload it once the PDF should be ready
+    response['Refresh'] = str(REPORT_RETRY_AFTER)
     return response
 
+
 @login_required
 def settings(request):
     profile_picture_form = ProfilePictureForm(instance=request.user.profile)
@@ -513,10 +419,11 @@ def mock_interview_result(request, interview_id):
     Create mock interview results for testing the reports page
     This would be replaced by actual interview processing in production
     """
-    interview = get_object_or_404(Interview, id=interview_id, user=request.user)
+    # Join the result so the check below doesn't need a query of its own
+    interview = get_object_or_404(Interview.objects.select_related('result'), id=interview_id, user=request.user)
     
     # Check if result already exists
-    if hasattr(interview, 'result'):
+    if getattr(interview, 'result', None) is not None:
         messages.info(request, "This interview already has results.")
         return redirect('reports')
     
@@ -525,49 +432,24 @@ def mock_interview_result(request, interview_id):
     non_technical_score = random.randint(30, 95)
     overall_score = (technical_score + non_technical_score) // 2
     
-    # Create result
-    result = InterviewResult.objects.create(
-        interview=interview,
-        technical_score=technical_score,
-        non_technical_score=non_technical_score,
-        overall_score=overall_score,
-        feedback="This is automated feedback for your interview performance. You did well in some areas but need improvement in others."
-    )
-    
     # Generate daily progress data (last 14 days)
-    daily_data = {}
-    start_date = timezone.now().date() - timedelta(days=13)
+    import numpy as np
     
     # Start with a base score and vary it
     base_score = 20
-    scores = []
     
-    for i in range(14):
-        current_date = start_date + timedelta(days=i)
-        date_str = current_date.strftime('%d-%b-%y')
-        
-        # Create a somewhat realistic progression
-        if i < 3:
-            # First few days - low scores
-            score = base_score + random.randint(-10, 10)
-        elif i < 7:
-            # Middle days - improving
-            score = base_score + 30 + random.randint(-10, 20)
-        elif i < 10:
-            # Later days - plateau or slight dip
-            score = base_score + 50 + random.randint(-15, 5)
-        else:
-            # Final days - improvement to final score
-            score = base_score + 40 + random.randint(0, 40)
-        
-        # Ensure score is between 0 and 100
-        score = max(0, min(score, 100))
-        scores.append(score)
-        daily_data[date_str] = score
+    # Create a somewhat realistic progression: low first few days, improving
+    # middle days, a plateau or slight dip, then improvement to the final score.
+    # Each day's offset and inclusive jitter range come from its band.
+    offsets = np.repeat([0, 30, 50, 40], [3, 4, 3, 4])
+    jitter_lo = np.repeat([-10, -10, -15, 0], [3, 4, 3, 4])
+    jitter_hi = np.repeat([10, 20, 5, 40], [3, 4, 3, 4])
+    jitter = np.random.default_rng().integers(jitter_lo, jitter_hi, endpoint=True)
     
-    # Save daily progress data
-    result.set_daily_progress(daily_data)
-    result.save()
+    # Ensure score is between 0 and 100
+    scores = np.clip(base_score + offsets + jitter, 0, 100)
+    dates = recent_day_labels(14)
+    daily_data = dict(zip(dates, scores.tolist()))
     
     # Create some mock questions and answers
     questions = [
@@ -578,22 +460,34 @@ def mock_interview_result(request, interview_id):
         "Where do you see yourself in 5 years?"
     ]
     
-    for q_text in questions:
-        is_technical = random.choice([True, False])
-        score = random.randint(30, 95)
-        
-        InterviewQuestion.objects.create(
+    # Result, questions and status in one transaction; the result is created
+    # with its progress data and the questions go in as a single INSERT
+    with transaction.atomic():
+        result = InterviewResult.objects.create(
             interview=interview,
-            question_text=q_text,
-            answer_text="This is a sample answer to the question.",
-            score=score,
-            feedback="Your answer was good but could be improved by providing more specific examples.",
-            is_technical=is_technical
+            technical_score=technical_score,
+            non_technical_score=non_technical_score,
+            overall_score=overall_score,
+            feedback="This is automated feedback for your interview performance. You did well in some areas but need improvement in others.",
+            daily_progress_data=daily_data
         )
-    
-    # Update interview status
-    interview.status = 'completed'
-    interview.save()
+        
+        InterviewQuestion.objects.bulk_create([
+            InterviewQuestion(
+                interview=interview,
+                question_text=q_text,
+                answer_text="This is a sample answer to the question.",
+                score=random.randint(30, 95),
+                feedback="Your answer was good but could be improved by providing more specific examples.",
+                is_technical=random.choice([True, False])
+            )
+            for q_text in questions
+        ])
+        
+        # Update interview status
+        interview.status = 'completed'
+        interview.save(update_fields=['status'])
+    invalidate_user_interview_context(request.user.id)
     
     # Note: Behavioral data should come from actual camera analysis during interview
     # This mock function now only creates basic interview structure without static behavioral data
@@ -602,9 +496,6 @@ def mock_interview_result(request, interview_id):
     messages.success(request, "Mock interview structure created. Real behavioral analysis will be populated during actual interviews.")
     return redirect('reports')
 
-def faqs(request):
-    return render(request, 'home/faqs.html')
-
 @login_required
 def interview_session(request, interview_id=None):
     """
@@ -617,8 +508,7 @@ def interview_session(request, interview_id=None):
         interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     else:
         # Get the latest job description and resume
-        latest_jd = JobDescription.objects.filter(user=request.user).order_by('-uploaded_at').first()
-        latest_resume = Resume.objects.filter(user=request.user).order_by('-uploaded_at').first()
+        latest_jd, latest_resume, _ = get_user_interview_context(request.user)
         
         if not latest_jd or not latest_resume:
             messages.error(request, 'Please upload both a job description and a resume before starting an interview.')
@@ -642,81 +532,63 @@ def get_interview_questions(request, interview_id):
     """API endpoint to get AI-generated interview questions."""
     interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     
-    # Check if questions already exist for this interview
-    existing_questions = InterviewQuestion.objects.filter(interview=interview)
-    if existing_questions.exists():
+    # Check if questions already exist for this interview; one query fetches
+    # plain rows instead of probing with exists() and building model instances
+    existing_questions = list(InterviewQuestion.objects.filter(interview_id=interview.id).values(
+        'id', 'is_technical', 'question_text'
+    ))
+    if existing_questions:
         # Return existing questions
-        questions_data = []
-        for q in existing_questions:
-            questions_data.append({
-                'id': q.id,
-                'type': 'technical' if q.is_technical else 'non-technical',
-                'question': q.question_text,
-                'follow_up_questions': []  # We could store these in the future
-            })
-        return JsonResponse({'questions': questions_data})
-    
-    # Initialize AI Interviewer
-    ai_interviewer = AIInterviewer()
-    
-    # Load job description and CV
-    jd_path = interview.job_description.file.path
-    cv_path = interview.resume.file.path
-    
-    try:
-        # Load files directly if they exist on disk
-        if os.path.exists(jd_path) and os.path.exists(cv_path):
-            ai_interviewer.job_description = ai_interviewer.load_file_content(jd_path)
-            ai_interviewer.cv = ai_interviewer.load_file_content(cv_path)
-        else:
-            # Otherwise load from Django file objects
-            ai_interviewer.load_job_description_from_django_file(interview.job_description.file)
-            ai_interviewer.load_cv_from_django_file(interview.resume.file)
-        
-        # Generate questions
-        questions = ai_interviewer.generate_questions()
-        
-        # Save questions to database
-        for q in questions:
-            InterviewQuestion.objects.create(
-                interview=interview,
-                question_text=q['question'],
-                is_technical=(q['type'] == 'technical')
-            )
-        
-        return JsonResponse({'questions': questions})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        questions_data = [{
+            'id': q['id'],
+            'type': 'technical' if q['is_technical'] else 'non-technical',
+            'question': q['question_text'],
+            'follow_up_questions': []  # We could store these in the future
+        } for q in existing_questions]
+        return _json_response({'questions': questions_data})
+    
+    # A previous background run failed: report it once, the next poll retries
+    error = pop_question_generation_error(interview.id)
+    if error:
+        return _json_response({'error': error}, status=500)
+    
+    # Generating questions is an LLM call; run it off the request thread and
+    # let the client poll this endpoint until the questions exist
+    generate_questions_async(interview.id)
+    response = _json_response({'status': 'pending'}, status=202)
+    response['Retry-After'] = str(QUESTIONS_RETRY_AFTER)
+    return response
 
 @csrf_exempt
 @login_required
 def submit_interview_answer(request, interview_id):
     """API endpoint to submit an answer to an interview question."""
     if request.method != 'POST':
-        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+        return _json_response({'error': 'Only POST requests are allowed'}, status=405)
     
     interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     
     try:
-        data = json.loads(request.body)
+        data = _json_loads(request.body)
         question_id = data.get('question_id')
         answer = data.get('answer')
         
         if not question_id or not answer:
-            return JsonResponse({'error': 'Question ID and answer are required'}, status=400)
+            return _json_response({'error': 'Question ID and answer are required'}, status=400)
         
-        # Get the question
-        question = get_object_or_404(InterviewQuestion, id=question_id, interview=interview)
+        # Save the answer with a single UPDATE; matching on the interview keeps
+        # the ownership check from the lookup above
+        updated = InterviewQuestion.objects.filter(
+            id=question_id, interview_id=interview.id
+        ).update(answer_text=answer)
+        if not updated:
+            return _json_response({'error': 'Question not found'}, status=404)
         
-        # Save the answer
-        question.answer_text = answer
-        question.save()
-        
-        return JsonResponse({'success': True})
+        return _json_response({'success': True})
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return _json_response({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return _json_response({'error': str(e)}, status=500)
 
 @csrf_exempt
 @login_required
@@ -727,113 +599,54 @@ def complete_interview(request, interview_id):
     
     interview = get_object_or_404(Interview, id=interview_id, user=request.user)
     
-    # Get all questions and answers for this interview
-    questions = InterviewQuestion.objects.filter(interview=interview)
-    
-    # Check if all questions have answers
-    unanswered = questions.filter(answer_text='')
-    if unanswered.exists() and not request.GET.get('force'):
+    # Check if all questions have answers, counting the unanswered ones in one aggregate query
+    stats = InterviewQuestion.objects.filter(interview_id=interview.id).aggregate(
+        unanswered=Count('id', filter=Q(answer_text=''))
+    )
+    if stats['unanswered'] and not request.GET.get('force'):
         return JsonResponse({
             'error': 'Not all questions have been answered',
-            'unanswered_count': unanswered.count()
+            'unanswered_count': stats['unanswered']
         }, status=400)
     
-    try:
-        # Initialize AI Interviewer
-        ai_interviewer = AIInterviewer()
-        
-        # Load job description and CV
-        jd_path = interview.job_description.file.path
-        cv_path = interview.resume.file.path
-        
-        # Load files directly if they exist on disk
-        if os.path.exists(jd_path) and os.path.exists(cv_path):
-            ai_interviewer.job_description = ai_interviewer.load_file_content(jd_path)
-            ai_interviewer.cv = ai_interviewer.load_file_content(cv_path)
-        else:
-            # Otherwise load from Django file objects
-            ai_interviewer.load_job_description_from_django_file(interview.job_description.file)
-            ai_interviewer.load_cv_from_django_file(interview.resume.file)
-        
-        # Prepare interview data for report generation
-        interview_data = []
-        for q in questions:
-            interview_data.append({
-                'question_number': q.id,
-                'question_data': {
-                    'id': q.id,
-                    'type': 'technical' if q.is_technical else 'non-technical',
-                    'question': q.question_text
-                },
-                'answer': q.answer_text or "No answer provided."
-            })
-        
-        # Generate report
-        report = ai_interviewer.generate_report(interview_data)
-        
-        # Extract scores from the report
-        technical_score = 0
-        non_technical_score = 0
-        overall_score = 0
-        
-        # Try to extract scores using regex
-        import re
-        tech_match = re.search(r'Technical Average[^\d]*(\d+(\.\d+)?)', report)
-        non_tech_match = re.search(r'Non-Technical Average[^\d]*(\d+(\.\d+)?)', report)
-        overall_match = re.search(r'Final Score[^\d]*(\d+(\.\d+)?)', report)
-        
-        if tech_match:
-            technical_score = float(tech_match.group(1)) * 10  # Convert from 0-10 to 0-100
-        if non_tech_match:
-            non_technical_score = float(non_tech_match.group(1)) * 10  # Convert from 0-10 to 0-100
-        if overall_match:
-            overall_score = float(overall_match.group(1))
-        
-        # Create or update the interview result
-        result, created = InterviewResult.objects.update_or_create(
-            interview=interview,
-            defaults={
-                'technical_score': technical_score,
-                'non_technical_score': non_technical_score,
-                'overall_score': overall_score,
-                'feedback': report
-            }
-        )
-        
-        # Generate daily progress data (last 7 days)
-        daily_data = {}
-        start_date = timezone.now().date() - timedelta(days=6)
-        
-        # Create a progression that ends at the overall score
-        for i in range(7):
-            current_date = start_date + timedelta(days=i)
-            date_str = current_date.strftime('%d-%b-%y')
-            
-            # Start low and progress toward the final score
-            progress_factor = i / 6.0  # 0 to 1
-            base_score = 30 + (overall_score - 30) * progress_factor
-            variation = random.randint(-5, 5)
-            score = max(0, min(100, base_score + variation))
-            
-            daily_data[date_str] = score
-        
-        # Save daily progress data
-        result.set_daily_progress(daily_data)
-        result.save()
-        
-        # Update interview status
-        interview.status = 'completed'
-        interview.save()
-        
-        return JsonResponse({
-            'success': True,
-            'report_id': result.id,
-            'technical_score': technical_score,
-            'non_technical_score': non_technical_score,
-            'overall_score': overall_score
-        })
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    # The report is an LLM call; score the interview off the request thread
+    # and let the client poll interview_result until it is stored
+    score_interview_async(interview.id)
+    response = _json_response({
+        'status': 'pending',
+        'result_url': reverse('interview_result', args=[interview.id])
+    }, status=202)
+    response['Retry-After'] = str(SCORING_RETRY_AFTER)
+    return response
+
+@login_required
+def interview_result(request, interview_id):
+    """API endpoint to poll for the result complete_interview is generating."""
+    interview = get_object_or_404(Interview, id=interview_id, user=request.user)
+    
+    # A previous background run failed: report it once
+    error = pop_scoring_error(interview.id)
+    if error:
+        return _json_response({'error': error}, status=500)
+    
+    # While a run is in flight any stored result is the one it will replace
+    result = None
+    if not is_scoring_pending(interview.id):
+        result = InterviewResult.objects.filter(interview_id=interview.id).only(
+            'id', 'technical_score', 'non_technical_score', 'overall_score'
+        ).first()
+    if result is None:
+        response = _json_response({'status': 'pending'}, status=202)
+        response['Retry-After'] = str(SCORING_RETRY_AFTER)
+        return response
+    
+    return _json_response({
+        'success': True,
+        'report_id': result.id,
+        'technical_score': result.technical_score,
+        'non_technical_score': result.non_technical_score,
+        'overall_score': result.overall_score
+    })
 
 # Add this new view function to handle interview completion
 @login_required
@@ -843,49 +656,53 @@ def interview_complete(request):
     Updates the interview status and creates a placeholder for results.
     """
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        interview_id = request.POST.get('interview_id')
+        try:
+            interview_id = int(request.POST.get('interview_id'))
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'Invalid interview id'}, status=400)
         
         try:
-            interview = Interview.objects.get(id=interview_id, user=request.user)
-            interview.status = 'completed'
-            interview.save()
+            # Mark the interview completed without loading it; no row matched
+            # means it doesn't exist or isn't this user's
+            if not Interview.objects.filter(id=interview_id, user=request.user).update(status='completed'):
+                return JsonResponse({'success': False, 'message': 'Interview not found'}, status=404)
+            invalidate_user_interview_context(request.user.id)
             
             # Create a placeholder result (in a real app, this would be generated by AI analysis)
             # This is similar to the mock_interview_result function but simplified
-            if not hasattr(interview, 'result'):
-                technical_score = random.randint(30, 95)
-                non_technical_score = random.randint(30, 95)
-                overall_score = (technical_score + non_technical_score) // 2
-                
-                result = InterviewResult.objects.create(
-                    interview=interview,
-                    technical_score=technical_score,
-                    non_technical_score=non_technical_score,
-                    overall_score=overall_score,
-                    feedback="This is automated feedback for your interview performance."
-                )
-                
-                # Generate simple daily progress data
-                daily_data = {}
-                start_date = timezone.now().date() - timedelta(days=6)
-                for i in range(7):
-                    current_date = start_date + timedelta(days=i)
-                    date_str = current_date.strftime('%d-%b-%y')
-                    score = 30 + (i * 10) + random.randint(-5, 5)
-                    score = max(0, min(score, 100))
-                    daily_data[date_str] = score
-                
-                result.set_daily_progress(daily_data)
-                result.save()
+            technical_score = random.randint(30, 95)
+            non_technical_score = random.randint(30, 95)
+            overall_score = (technical_score + non_technical_score) // 2
+            
+            # Generate simple daily progress data, rising 10 points a day from 30
+            import numpy as np
+            variation = np.random.default_rng().integers(-5, 5, size=7, endpoint=True)
+            scores = np.clip(np.arange(30, 100, 10) + variation, 0, 100)
+            dates = recent_day_labels(7)
+            
+            # An existing result is left as it is; otherwise the placeholder,
+            # progress series included, goes in with a single INSERT
+            InterviewResult.objects.get_or_create(
+                interview_id=interview_id,
+                defaults={
+                    'technical_score': technical_score,
+                    'non_technical_score': non_technical_score,
+                    'overall_score': overall_score,
+                    'feedback': "This is automated feedback for your interview performance.",
+                    'daily_progress_data': dict(zip(dates, scores.tolist())),
+                }
+            )
             
             return JsonResponse({'success': True, 'message': 'Interview completed successfully'})
             
-        except Interview.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'Interview not found'}, status=404)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
     
     return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
 
+# The FAQ content is the same for everyone; only base.html's greeting depends
+# on the visitor, so the page is cached per session cookie
+@cache_page(60 * 60 * 24)
+@vary_on_cookie
 def faqs(request):
     return render(request, 'home/faqs.html')